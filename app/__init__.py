@@ -1,56 +1,150 @@
-from flask import Flask, render_template
+import hashlib
+import importlib.util
+import click
+from flask import Flask, render_template, current_app
+from flask.cli import with_appcontext
 from .extensions import mongo, login_manager, bootstrap, mail, principal, limiter
 from .auth import auth_bp
 from .main import main_bp
 from .notes import notes_bp
-import markdown
+from .api import api_bp
+from .rendering import render_markdown, note_html, configure_render_cache
+from .indexes import indexes_cli, ensure_indexes_once
+from .mailqueue import mail_queue, mail_cli
+from .passwords import password_hasher
+from .monitoring import pool_metrics, command_metrics, request_metrics
+from .ratelimit import AppMongoStorage  # noqa: F401 (registrira shemu 'app-mongodb://' za limiter)
+from .startup import run_once
+from .stats import stats_cli
+from .compression import compressor
+from .assets import asset_manifest, assets_cli
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object('config.Config')
 
     # init extensions
-    mongo.init_app(app)
+    mongo.init_app(app, **_mongo_client_options(app.config))
+    # prvi before_request: mjeri se i vrijeme ostalih ekstenzija (login, limiter)
+    request_metrics.init_app(app)
     login_manager.init_app(app)
     bootstrap.init_app(app)
     mail.init_app(app)
+    mail_queue.init_app(app)
     limiter.init_app(app)
+    password_hasher.init_app(app)
     principal.init_app(app)
+    compressor.init_app(app)
+    asset_manifest.init_app(app)
 
     # register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(notes_bp)
+    app.register_blueprint(api_bp)
     
     register_error_handlers(app)
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(seed_users_command)
    
     # login settings
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
+    # JSON API: 401 umjesto redirecta na formu za prijavu
+    login_manager.blueprint_login_views = {'api': None}
+
+    #Custom Jinja filter za Markdown konverziju (s cacheom po workeru)
+    configure_render_cache(app.config)
 
-    #Custom Jinja filter za Markdown konverziju
     @app.template_filter('markdown_to_html')
     def markdown_to_html_filter(text):
-        if not text:
-            return ""
         # Koristimo 'fenced_code' ekstenziju za podršku blokova koda
-        return markdown.markdown(str(text), extensions=['fenced_code'])
+        return render_markdown(text)
+
+    # Spremljeni (pred-renderirani) HTML bilješke
+    app.add_template_filter(note_html, 'note_html')
 
     # import here to avoid circular imports
-    from .models import User
+    from .models import User, user_cache
     from .extensions import mongo as _mongo
 
+    user_cache.configure(
+        max_entries=app.config['USER_CACHE_MAX_ENTRIES'],
+        ttl=app.config['USER_CACHE_TTL']
+    )
+
     @login_manager.user_loader
     def load_user(user_id):
-        return User.get_by_id(user_id)
+        return User.load_for_session(user_id)
 
-    # Automatsko kreiranje admin korisnika (ako ne postoji)
-    with app.app_context():
-        _create_default_admin()
-        _create_default_user()
+    # Startup zadaci (indeksi, default korisnici) izvršavaju se jednom po deployu:
+    # prvi worker preuzme zadatak u 'app_meta', ostali ga preskaču bez hashiranja
+    # lozinki. S RUN_STARTUP_TASKS=False pokreću se ručno
+    # (`flask indexes ensure`, `flask seed-users`).
+    if app.config['RUN_STARTUP_TASKS']:
+        with app.app_context():
+            ensure_indexes_once()
+            seed_default_users_once()
 
     return app
 
+def _seed_version(config):
+    # novi default korisnici u ENV varijablama -> nova verzija -> seed se ponovno izvršava
+    raw = '|'.join(str(config[key]) for key in ('ADMIN_USERNAME', 'ADMIN_EMAIL', 'USER_USERNAME', 'USER_EMAIL'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+def _seed_default_users():
+    # Automatsko kreiranje admin korisnika (ako ne postoji)
+    _create_default_admin()
+    _create_default_user()
+
+def seed_default_users_once():
+    return run_once('seed-default-users', _seed_version(current_app.config), _seed_default_users)
+
+@click.command('seed-users')
+@with_appcontext
+def seed_users_command():
+    """Kreira default admin i user korisnike (ako ne postoje)."""
+    created_admin = _create_default_admin()
+    created_user = _create_default_user()
+    click.echo(f'Admin kreiran: {created_admin}, user kreiran: {created_user}')
+
+# modul potreban za pojedini kompresor u pymongo
+_COMPRESSOR_MODULES = {'zstd': 'zstandard', 'snappy': 'snappy', 'zlib': 'zlib'}
+
+def _mongo_client_options(config):
+    """
+    Opcije za MongoClient iz Configa (pool, timeouti, kompresija, TLS).
+    """
+    compressors = [
+        name.strip() for name in (config['MONGO_COMPRESSORS'] or '').split(',')
+        if name.strip() in _COMPRESSOR_MODULES
+        and importlib.util.find_spec(_COMPRESSOR_MODULES[name.strip()]) is not None
+    ]
+    options = {
+        'maxPoolSize': config['MONGO_MAX_POOL_SIZE'],
+        'minPoolSize': config['MONGO_MIN_POOL_SIZE'],
+        'maxIdleTimeMS': config['MONGO_MAX_IDLE_TIME_MS'],
+        'waitQueueTimeoutMS': config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+        'connectTimeoutMS': config['MONGO_CONNECT_TIMEOUT_MS'],
+        'serverSelectionTimeoutMS': config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        'socketTimeoutMS': config['MONGO_SOCKET_TIMEOUT_MS'],
+        'event_listeners': [pool_metrics, command_metrics],
+    }
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+
+    ca_file = config['MONGO_TLS_CA_FILE']
+    if not ca_file and (config['MONGO_URI'] or '').startswith('mongodb+srv://'):
+        import certifi
+        ca_file = certifi.where()
+    if ca_file:
+        options['tlsCAFile'] = ca_file
+    return options
+
 def _create_default_admin():
     """
     Stvara default admin account čiji se podaci čitaju iz ENV varijabli.
@@ -0,0 +1,8 @@
+from flask import Blueprint
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# JSON API za bilješke; prijava je ista kao za HTML (session cookie),
+# a neprijavljeni zahtjev dobiva 401 umjesto redirecta (vidi create_app)
+
+from . import routes
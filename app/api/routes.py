@@ -0,0 +1,331 @@
+import json
+from datetime import datetime
+from bson.objectid import ObjectId
+from flask import request, current_app, abort, url_for
+from flask_login import login_required, current_user
+from werkzeug.exceptions import HTTPException
+from . import api_bp
+from ..extensions import mongo
+from ..pagination import paginate
+from ..rendering import RENDER_VERSION, render_note_html, plain_text_preview
+from ..stats import notes_version
+from ..http_cache import conditional_get
+from ..notes import service, revisions
+
+# Polja koja klijent može tražiti (?fields=id,title,preview) -> polja u bazi.
+# created_at se uvijek čita jer je dio kursora paginacije.
+FIELDS = {
+    'id': (),
+    'title': ('title',),
+    'content': ('content',),
+    'content_html': ('content_html', 'render_version'),
+    'preview': ('preview', 'render_version'),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+}
+DEFAULT_FIELDS = ('id', 'title', 'content', 'created_at', 'updated_at')
+RENDERED_FIELDS = {'content_html', 'preview'}
+
+
+def _json_default(value):
+    # samo za vrijednosti koje json ne zna sam (ObjectId, datetime)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} nije JSON serijalizabilan')
+
+
+def _json(payload, status=200):
+    # običan json.dumps umjesto app.json: BSON provider Flask-PyMongo rekurzivno
+    # prolazi kroz svaku vrijednost odgovora, što je kod većih stranica sporo
+    body = json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(',', ':'))
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+@api_bp.errorhandler(HTTPException)
+def _http_error(e):
+    description = 'Potrebna je prijava.' if e.code == 401 else e.description
+    return _json({'error': description, 'status': e.code}, e.code)
+
+
+def _own_notes_version(**kwargs):
+    return notes_version(ObjectId(current_user.id))
+
+
+def _requested_fields():
+    raw = request.args.get('fields')
+    if not raw:
+        return DEFAULT_FIELDS
+    names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in FIELDS]
+    if unknown or not names:
+        abort(400, f'Nepoznata polja: {", ".join(unknown)}. Dozvoljena: {", ".join(FIELDS)}.')
+    return names
+
+
+def _projection(names):
+    projection = {'created_at': 1}
+    for name in names:
+        projection.update(dict.fromkeys(FIELDS[name], 1))
+    return projection
+
+
+def _fill_rendered(docs, names):
+    """
+    Bilješke bez spremljenog HTML-a trenutne verzije (prije render-backfilla)
+    renderiraju se ovdje; sadržaj se za njih dohvaća jednim dodatnim upitom.
+    """
+    if not RENDERED_FIELDS.intersection(names):
+        return
+    stale = [doc for doc in docs if doc.get('render_version') != RENDER_VERSION]
+    if not stale:
+        return
+    contents = {
+        doc['_id']: doc.get('content')
+        for doc in mongo.db.notes.find({'_id': {'$in': [doc['_id'] for doc in stale]}}, {'content': 1})
+    }
+    for doc in stale:
+        html = render_note_html(contents.get(doc['_id']))
+        doc['content_html'] = html
+        doc['preview'] = plain_text_preview(html)
+
+
+def _note_json(doc, names):
+    return {name: doc.get('_id' if name == 'id' else name) for name in names}
+
+
+def _json_body():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400, 'Tijelo zahtjeva mora biti JSON objekt.')
+    return body
+
+
+def _text(data, field):
+    """
+    Sanitizirana vrijednost tekstualnog polja ili None ako polje nije zadano.
+    """
+    value = data.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'Polje "{field}" mora biti tekst.')
+    return service.clean(value)
+
+
+def _note_changes(data, require_title):
+    title = _text(data, 'title')
+    content = _text(data, 'content')
+    if (require_title or title is not None) and not title:
+        raise ValueError('Naslov je obavezan.')
+    if title is None and content is None:
+        raise ValueError('Zadajte "title" i/ili "content".')
+    return title, content
+
+
+def _editor():
+    return ObjectId(current_user.id), current_user.username
+
+
+def _find_own(note_id, names):
+    query = service.note_query(note_id, current_user.id)
+    doc = mongo.db.notes.find_one(query, _projection(names)) if query else None
+    if doc is None:
+        abort(404, 'Bilješka nije pronađena.')
+    _fill_rendered([doc], names)
+    return doc
+
+
+def _batch_items(body, key):
+    items = body.get(key)
+    if not isinstance(items, list):
+        abort(400, f'Polje "{key}" mora biti lista.')
+    limit = current_app.config['API_BATCH_MAX']
+    if len(items) > limit:
+        abort(400, f'Najviše {limit} bilješki po zahtjevu.')
+    return items
+
+
+@api_bp.route('/notes', methods=['GET'])
+@login_required
+@conditional_get(_own_notes_version)
+def list_notes():
+    names = _requested_fields()
+    limit = request.args.get('limit', current_app.config['API_PER_PAGE'], type=int)
+    page = paginate(
+        mongo.db.notes,
+        {'user_id': ObjectId(current_user.id)},
+        cursor=request.args.get('cursor'),
+        per_page=min(max(limit, 1), current_app.config['API_MAX_PER_PAGE']),
+        projection=_projection(names)
+    )
+    _fill_rendered(page.items, names)
+    return _json({
+        'items': [_note_json(doc, names) for doc in page.items],
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+@api_bp.route('/notes/<note_id>', methods=['GET'])
+@login_required
+@conditional_get(_own_notes_version)
+def get_note(note_id):
+    names = _requested_fields()
+    return _json(_note_json(_find_own(note_id, names), names))
+
+
+@api_bp.route('/notes', methods=['POST'])
+@login_required
+def create_note():
+    # ?fields= se provjerava prije upisa: 400 ne smije ostaviti spremljenu bilješku
+    names = _requested_fields()
+    try:
+        title, content = _note_changes(_json_body(), require_title=True)
+    except ValueError as e:
+        abort(400, str(e))
+    note = service.insert_note(current_user.id, current_user.username, title, content or '')
+    response = _json(_note_json(note, names), 201)
+    response.headers['Location'] = url_for('api.get_note', note_id=str(note['_id']))
+    return response
+
+
+@api_bp.route('/notes/<note_id>', methods=['PATCH'])
+@login_required
+def update_note(note_id):
+    names = _requested_fields()
+    oid = service.parse_id(note_id)
+    if oid is None:
+        abort(404, 'Bilješka nije pronađena.')
+    try:
+        changes = _note_changes(_json_body(), require_title=False)
+    except ValueError as e:
+        abort(400, str(e))
+    # vlasništvo se provjerava u uvjetu upisa (kao u edit_note)
+    query = {'_id': oid, 'user_id': ObjectId(current_user.id)}
+    title, content = changes
+    if title is None or content is None:
+        # polje koje nije zadano ostaje; upis vrijedi samo za pročitanu verziju
+        current = mongo.db.notes.find_one(query, {'title': 1, 'content': 1, 'revision': 1})
+        if current is None:
+            abort(404, 'Bilješka nije pronađena.')
+        title = current.get('title', '') if title is None else title
+        content = current.get('content', '') if content is None else content
+        query['revision'] = current.get('revision')
+    if service.update_note(query, title, content, _editor()) is None:
+        if 'revision' in query and mongo.db.notes.count_documents({'_id': oid, 'user_id': query['user_id']}, limit=1):
+            abort(409, 'Bilješka je u međuvremenu izmijenjena, pokušajte ponovno.')
+        abort(404, 'Bilješka nije pronađena.')
+    return _json(_note_json(_find_own(note_id, names), names))
+
+
+@api_bp.route('/notes/<note_id>', methods=['DELETE'])
+@login_required
+def delete_note(note_id):
+    query = service.note_query(note_id, current_user.id)
+    if query is None or not service.delete_note(query, _editor()):
+        abort(404, 'Bilješka nije pronađena.')
+    return current_app.response_class(status=204)
+
+
+@api_bp.route('/notes/batch-delete', methods=['POST'])
+@login_required
+def batch_delete():
+    # {"ids": [...]} -> status za svaki ID: deleted / not_found / invalid
+    ids = _batch_items(_json_body(), 'ids')
+    parsed = [service.parse_id(note_id) if isinstance(note_id, str) else None for note_id in ids]
+    deleted = service.delete_notes({oid for oid in parsed if oid is not None}, current_user.id, _editor())
+
+    results = []
+    for note_id, oid in zip(ids, parsed):
+        if oid is None:
+            results.append({'id': note_id, 'status': 'invalid', 'error': 'Neispravan ID.'})
+        else:
+            results.append({'id': note_id, 'status': 'deleted' if oid in deleted else 'not_found'})
+    return _json({'deleted': len(deleted), 'results': results})
+
+
+@api_bp.route('/notes/batch', methods=['PATCH'])
+@login_required
+def batch_update():
+    # {"updates": [{"id", "title"?, "content"?}, ...]} -> jedan bulk_write za sve ispravne;
+    # status za svaki: updated / not_found / conflict / invalid
+    items = _batch_items(_json_body(), 'updates')
+    changes = {}
+    errors = {}
+    for i, item in enumerate(items):
+        note_id = item.get('id') if isinstance(item, dict) else None
+        oid = service.parse_id(note_id) if isinstance(note_id, str) else None
+        try:
+            if oid is None:
+                raise ValueError('Neispravan ID.')
+            if oid in changes:
+                raise ValueError('ID se ponavlja u zahtjevu.')
+            changes[oid] = _note_changes(item, require_title=False)
+        except ValueError as e:
+            errors[i] = str(e)
+    updated, conflicts = service.update_notes(changes, current_user.id, _editor()) if changes else (set(), set())
+
+    results = []
+    for i, item in enumerate(items):
+        note_id = item.get('id') if isinstance(item, dict) else None
+        if i in errors:
+            results.append({'id': note_id, 'status': 'invalid', 'error': errors[i]})
+        elif ObjectId(note_id) in conflicts:
+            results.append({'id': note_id, 'status': 'conflict',
+                            'error': 'Bilješka je u međuvremenu izmijenjena, pokušajte ponovno.'})
+        else:
+            status = 'updated' if ObjectId(note_id) in updated else 'not_found'
+            results.append({'id': note_id, 'status': status})
+    return _json({'updated': len(updated), 'results': results})
+
+
+REVISION_FIELDS = ('rev', 'title', 'kind', 'size', 'stored_size', 'replaced_at', 'replaced_by')
+
+
+def _revision_note(note_id):
+    query = service.note_query(note_id, current_user.id)
+    note = mongo.db.notes.find_one(query, {'title': 1, 'content': 1, 'revision': 1}) if query else None
+    if note is None:
+        abort(404, 'Bilješka nije pronađena.')
+    return note
+
+
+def _revision_or_404(note_id, rev):
+    note = _revision_note(note_id)
+    try:
+        revision = revisions.get_revision(note, rev)
+    except revisions.RevisionChainError:
+        current_app.logger.exception('Verzija %s bilješke se ne može rekonstruirati', rev)
+        revision = None
+    if revision is None:
+        abort(404, 'Verzija bilješke nije pronađena.')
+    return revision
+
+
+@api_bp.route('/notes/<note_id>/revisions', methods=['GET'])
+@login_required
+def list_revisions(note_id):
+    note = _revision_note(note_id)
+    return _json({
+        'current': note.get('revision', 0),
+        'items': [{name: doc.get(name) for name in REVISION_FIELDS} for doc in revisions.list_revisions(note['_id'])],
+    })
+
+
+@api_bp.route('/notes/<note_id>/revisions/<int:rev>', methods=['GET'])
+@login_required
+def get_revision(note_id, rev):
+    return _json(_revision_or_404(note_id, rev))
+
+
+@api_bp.route('/notes/<note_id>/revisions/<int:rev>/restore', methods=['POST'])
+@login_required
+def restore_revision(note_id, rev):
+    names = _requested_fields()
+    revision = _revision_or_404(note_id, rev)
+    query = service.note_query(note_id, current_user.id)
+    if service.update_note(query, revision['title'], revision['content'], _editor()) is None:
+        abort(404, 'Bilješka nije pronađena.')
+    return _json(_note_json(_find_own(note_id, names), names))
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import threading
+import urllib.request
+import click
+import flask_bootstrap
+from flask import current_app, request, abort, url_for
+from flask.cli import with_appcontext
+from .compression import COMPRESSIBLE_MIMETYPES, choose_encoding, compress_bytes
+from .extensions import bootstrap
+
+# Vendor CSS/JS (Bootstrap, bootstrap-icons, EasyMDE) posluženi iz aplikacije
+# umjesto s CDN-a (ASSETS_SERVE_LOCAL). Datoteke se spremaju u app/static/vendor
+# naredbom `flask assets vendor`, a poslužuju na /assets/ s hashom sadržaja u
+# imenu (easymde.min.3f2a9c1e04b7.js) i 'immutable' cacheom. Komprimirane
+# verzije računaju se jednom po procesu.
+
+CDN_BASE = 'https://cdn.jsdelivr.net/npm'
+
+# lokalna putanja (u app/static/vendor) -> CDN URL (izvor i fallback)
+VENDOR_ASSETS = {
+    'bootstrap/bootstrap.min.css':
+        f'{CDN_BASE}/bootstrap@{bootstrap.bootstrap_version}/dist/css/bootstrap.min.css',
+    'bootstrap/bootstrap.min.js':
+        f'{CDN_BASE}/bootstrap@{bootstrap.bootstrap_version}/dist/js/bootstrap.min.js',
+    'bootstrap/popper.min.js':
+        f'{CDN_BASE}/@popperjs/core@{bootstrap.popper_version}/dist/umd/popper.min.js',
+    'bootstrap-icons/bootstrap-icons.css':
+        f'{CDN_BASE}/bootstrap-icons@1.11.3/font/bootstrap-icons.css',
+    'bootstrap-icons/fonts/bootstrap-icons.woff2':
+        f'{CDN_BASE}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    'bootstrap-icons/fonts/bootstrap-icons.woff':
+        f'{CDN_BASE}/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    'easymde/easymde.min.css': f'{CDN_BASE}/easymde@2.18.0/dist/easymde.min.css',
+    'easymde/easymde.min.js': f'{CDN_BASE}/easymde@2.18.0/dist/easymde.min.js',
+}
+
+# Bootstrap datoteke već dolaze s Bootstrap-Flaskom, pa se kopiraju bez mreže
+BOOTSTRAP_PACKAGE_FILES = {
+    'bootstrap/bootstrap.min.css': 'css/bootstrap.min.css',
+    'bootstrap/bootstrap.min.js': 'js/bootstrap.min.js',
+    'bootstrap/popper.min.js': 'umd/popper.min.js',
+}
+
+MIMETYPES = {
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.woff2': 'font/woff2',
+    '.woff': 'font/woff',
+}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _fingerprinted(path, digest):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{digest}{ext}'
+
+
+class Asset:
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.url_path = _fingerprinted(path, digest=self.digest)
+        self.mimetype = MIMETYPES.get(os.path.splitext(path)[1], 'application/octet-stream')
+        self._encoded = {}
+
+    def encoded(self, encoding, level):
+        # statične datoteke komprimiraju se jednom, najjačom razinom
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress_bytes(self.data, encoding, level)
+        return self._encoded[encoding]
+
+
+class AssetManifest:
+    """
+    Popis vendor datoteka s hashom sadržaja, učitan pri prvom korištenju
+    (po procesu; datoteke se mijenjaju samo deployem).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assets = None
+        self._by_url = None
+
+    def init_app(self, app):
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.add_template_global(self.asset_url, 'asset_url')
+
+    @property
+    def folder(self):
+        return os.path.join(current_app.static_folder, 'vendor')
+
+    def _load(self):
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    assets = {}
+                    for path in VENDOR_ASSETS:
+                        full = os.path.join(self.folder, path)
+                        if os.path.isfile(full):
+                            with open(full, 'rb') as f:
+                                assets[path] = Asset(path, f.read())
+                    self._by_url = {asset.url_path: asset for asset in assets.values()}
+                    self._by_url.update(assets)
+                    self._assets = assets
+        return self._assets
+
+    def reset(self):
+        with self._lock:
+            self._assets = None
+            self._by_url = None
+
+    def asset_url(self, path):
+        """
+        URL vendor datoteke: lokalni s hashom ako je ASSETS_SERVE_LOCAL uključen
+        i datoteka postoji, inače CDN.
+        """
+        if current_app.config['ASSETS_SERVE_LOCAL']:
+            asset = self._load().get(path)
+            if asset is not None:
+                return url_for('assets', filename=asset.url_path)
+        return VENDOR_ASSETS[path]
+
+    def serve(self, filename):
+        self._load()
+        asset = self._by_url.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = None
+        if asset.mimetype in COMPRESSIBLE_MIMETYPES:
+            encoding = choose_encoding(request.accept_encodings)
+        data = asset.encoded(encoding, 11 if encoding == 'br' else 9) if encoding else asset.data
+
+        response = current_app.response_class(data, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(asset.digest, weak=bool(encoding))
+        if filename == asset.url_path:
+            response.headers['Cache-Control'] = IMMUTABLE
+        else:
+            # ime bez hasha (npr. fontovi na koje upućuje CSS): kraći cache
+            response.headers['Cache-Control'] = f'public, max-age={current_app.config["ASSETS_MAX_AGE"]}'
+        return response.make_conditional(request)
+
+
+asset_manifest = AssetManifest()
+
+
+@click.group('assets')
+def assets_cli():
+    """Vendor CSS/JS datoteke."""
+
+
+@assets_cli.command('vendor')
+@click.option('--force', is_flag=True, help='Ponovno preuzmi i postojeće datoteke.')
+@with_appcontext
+def vendor_command(force):
+    """Sprema vendor datoteke u app/static/vendor (Bootstrap iz paketa, ostalo s CDN-a)."""
+    package_static = os.path.join(os.path.dirname(flask_bootstrap.__file__), 'static', bootstrap.static_folder)
+    for path, url in VENDOR_ASSETS.items():
+        target = os.path.join(asset_manifest.folder, path)
+        if os.path.isfile(target) and not force:
+            click.echo(f'{path}: postoji')
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        source = os.path.join(package_static, BOOTSTRAP_PACKAGE_FILES.get(path, ''))
+        if path in BOOTSTRAP_PACKAGE_FILES and os.path.isfile(source):
+            shutil.copyfile(source, target)
+            click.echo(f'{path}: kopirano iz Bootstrap-Flask')
+            continue
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                data = response.read()
+        except OSError as e:
+            # bez lokalne datoteke asset_url() koristi CDN
+            click.echo(f'{path}: preuzimanje nije uspjelo ({e}), koristit će se CDN', err=True)
+            continue
+        with open(target, 'wb') as f:
+            f.write(data)
+        click.echo(f'{path}: preuzeto s {url}')
+    asset_manifest.reset()
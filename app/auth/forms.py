@@ -1,16 +1,8 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
+from wtforms.validators import DataRequired, Email, EqualTo, Length
 from ..models import User
 
-# Funkcija za provjeru postoji li već takav korisnik/email
-def validate_unique_username(form, field):
-    if User.get_by_username(field.data):
-        raise ValidationError('Korisničko ime je zauzeto.')
-
-def validate_unique_email(form, field):
-    if User.get_by_email(field.data):
-        raise ValidationError('Email je već registriran.')
 
 class LoginForm(FlaskForm):
     """Forma za prijavu korisnika."""
@@ -22,13 +14,11 @@ class RegistrationForm(FlaskForm):
     """Forma za registraciju novog korisnika."""
     username = StringField('Korisničko ime', validators=[
         DataRequired(), 
-        Length(min=4, max=25),
-        validate_unique_username # Custom validator
+        Length(min=4, max=25)
     ])
     email = StringField('Email', validators=[
         DataRequired(), 
-        Email(),
-        validate_unique_email # Custom validator
+        Email()
     ])
     password = PasswordField('Lozinka', validators=[
         DataRequired(), 
@@ -38,4 +28,17 @@ class RegistrationForm(FlaskForm):
         DataRequired(), 
         EqualTo('password', message='Lozinke se ne podudaraju.')
     ])
-    submit = SubmitField('Registriraj se')
\ No newline at end of file
+    submit = SubmitField('Registriraj se')
+
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+
+        # Provjera postoji li već takav korisnik/email - jedan upit za oba polja.
+        # Vrijednosti se normaliziraju isto kao pri spremanju u auth.register.
+        taken = User.find_conflicts(self.username.data.strip(), self.email.data.strip().lower())
+        if 'username' in taken:
+            self.username.errors.append('Korisničko ime je zauzeto.')
+        if 'email' in taken:
+            self.email.errors.append('Email je već registriran.')
+        return not taken
\ No newline at end of file
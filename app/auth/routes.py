@@ -3,7 +3,10 @@ from flask_login import login_user, logout_user, login_required, current_user
 from urllib.parse import urlparse
 from . import auth_bp
 from ..models import User
-from ..extensions import mongo, mail
+from ..extensions import mongo, limiter
+from ..ratelimit import config_limit
+from ..mailqueue import mail_queue
+from ..passwords import PasswordHasherBusy
 from flask_principal import Identity, AnonymousIdentity, identity_changed
 # FORMS
 from .forms import LoginForm, RegistrationForm
@@ -11,6 +14,7 @@ from .forms import LoginForm, RegistrationForm
 from flask_mail import Message
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit(config_limit('RATELIMIT_LOGIN'), methods=['POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
@@ -21,9 +25,15 @@ def login():
         username_or_email = form.username.data
         password = form.password.data
 
-        user = User.get_by_username(username_or_email) or User.get_by_email(username_or_email)
-        
-        if user and user.check_password(password):
+        user = User.find_by_login(username_or_email)
+
+        try:
+            valid = user is not None and user.check_password(password)
+        except PasswordHasherBusy:
+            flash('Previše prijava u ovom trenutku. Pokušajte ponovno za nekoliko sekundi.', 'warning')
+            return render_template('auth/login.html', form=form), 503
+
+        if valid:
             if not user.email_confirmed:
                 flash('Morate potvrditi email prije prijave. Provjerite svoj inbox.', 'warning')
                 return redirect(url_for('auth.login'))
@@ -45,6 +55,7 @@ def login():
 
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@limiter.limit(config_limit('RATELIMIT_REGISTER'), methods=['POST'])
 def register():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
@@ -57,7 +68,11 @@ def register():
         password = form.password.data
 
         # Kreiraj korisnika s početnom rolom 'user'
-        user = User.create(username, email, password, roles=['user'])
+        try:
+            user = User.create(username, email, password, roles=['user'])
+        except PasswordHasherBusy:
+            flash('Previše zahtjeva u ovom trenutku. Pokušajte ponovno za nekoliko sekundi.', 'warning')
+            return render_template('auth/register.html', form=form), 503
 
         # Generiraj token i pošalji potvrdu
         token = user.generate_confirmation_token()
@@ -66,14 +81,14 @@ def register():
         # Render email template (HTML)
         html = render_template('auth/confirm_email.html', confirm_url=confirm_url, user=user)
 
-        # Send mail
+        # Send mail (u red za slanje, SMTP se ne čeka u zahtjevu)
         subject = "Potvrdi svoj email"
         msg = Message(subject=subject, recipients=[user.email], html=html)
         try:
-            mail.send(msg)
+            mail_queue.send(msg)
             flash('Registracija uspješna. Poslan je email za potvrdu. Provjeri svoj inbox.', 'success')
         except Exception as e:
-            # Ako slanje maila ne uspije — izbaci grešku, ali korisnik je kreiran
+            # Ako spremanje/slanje maila ne uspije — izbaci grešku, ali korisnik je kreiran
             current_app.logger.exception("Neuspjelo slanje potvrde emaila: %s", e)
             flash('Registracija uspješna, ali slanje emaila nije uspjelo. Kontaktiraj administratora.', 'warning')
 
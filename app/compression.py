@@ -0,0 +1,95 @@
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli je opcionalan, bez njega samo gzip
+    brotli = None
+
+# Kompresija odgovora (gzip, brotli ako je instaliran) u after_request.
+# Komprimiraju se tekstualni odgovori veći od COMPRESS_MIN_SIZE; streamani
+# odgovori komprimiraju se dio po dio, uz flush nakon svakog dijela.
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'image/svg+xml',
+}
+
+
+def choose_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip zaglavlje
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress_bytes(data, encoding, level):
+    process, _, finish = _compressor(encoding, level)
+    return process(data) + finish()
+
+
+def _compress_stream(chunks, original, encoding, level):
+    process, flush, finish = _compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            # flush nakon svakog dijela da preglednik odmah dobije ono što je gotovo
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(original, 'close'):
+            original.close()
+
+
+class Compressor:
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def level(self, config, encoding):
+        return config['COMPRESS_BR_LEVEL'] if encoding == 'br' else config['COMPRESS_LEVEL']
+
+    def after_request(self, response):
+        config = current_app.config
+        if (not config['COMPRESS_ENABLED']
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        level = self.level(config, encoding)
+        if response.is_streamed:
+            original = response.response
+            response.response = _compress_stream(response.iter_encoded(), original, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(compress_bytes(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+        # komprimirani odgovor nije bajt-identičan, pa ETag postaje slab
+        # (If-None-Match ionako koristi slabu usporedbu)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compressor = Compressor()
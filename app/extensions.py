@@ -1,10 +1,67 @@
-from flask_pymongo import PyMongo
+import os
+import time
+from flask import g, request
+from flask_pymongo import PyMongo as _PyMongo
 from flask_login import LoginManager
 from flask_bootstrap import Bootstrap5
 from flask_mail import Mail
-from flask_limiter import Limiter
+from flask_limiter import Limiter as _Limiter, RateLimitExceeded
 from flask_limiter.util import get_remote_address
 from flask_principal import Principal
+from .monitoring import limiter_metrics
+
+class PyMongo(_PyMongo):
+    """
+    Flask-PyMongo s jednim MongoClientom po procesu. Klijent se spaja tek
+    pri prvom upitu (connect=False); ako je kreiran prije forka (npr.
+    gunicorn --preload), child proces dobiva novi klijent umjesto da dijeli
+    poolove i monitor dretve roditelja.
+    """
+    _fork_hook = False
+
+    def init_app(self, app, uri=None, *args, **kwargs):
+        kwargs.setdefault('connect', False)
+        super().init_app(app, uri, *args, **kwargs)
+        self._client_args = (uri or app.config['MONGO_URI'],) + args
+        self._client_kwargs = kwargs
+        if not self._fork_hook:
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+            self._fork_hook = True
+
+    def _reset_after_fork(self):
+        if self.cx is None:
+            return
+        db_name = self.db.name if self.db is not None else None
+        self.cx = type(self.cx)(*self._client_args, **self._client_kwargs)
+        self.db = self.cx[db_name] if db_name else None
+
+
+class Limiter(_Limiter):
+    """
+    Flask-Limiter koji mjeri koliko provjera limita (s upitima prema
+    storageu) traje po zahtjevu, vidi monitoring.limiter_metrics.
+    Limiti i storage čitaju se iz Configa (RATELIMIT_*).
+    """
+
+    def init_app(self, app):
+        super().init_app(app)
+        app.teardown_request(self._record_overhead)
+
+    def _check_request_limit(self, *args, **kwargs):
+        # poziva se u before_request i ponovno za rute s @limiter.limit
+        started = time.perf_counter()
+        try:
+            return super()._check_request_limit(*args, **kwargs)
+        except RateLimitExceeded:
+            g.ratelimit_breached = True
+            raise
+        finally:
+            g.ratelimit_seconds = g.get('ratelimit_seconds', 0.0) + time.perf_counter() - started
+
+    def _record_overhead(self, exc=None):
+        if 'ratelimit_seconds' in g:
+            limiter_metrics.observe(g.ratelimit_seconds, g.get('ratelimit_breached', False))
+
 
 mongo = PyMongo()
 login_manager = LoginManager()
@@ -13,7 +70,8 @@ mail = Mail()
 principal=Principal()
 limiter = Limiter(key_func=get_remote_address)
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["100 per minute"]  # <-- globalna ograničenja
-)
\ No newline at end of file
+
+@limiter.request_filter
+def _static_files():
+    # statičke datoteke i vendor asseti ne troše limit ni upite prema storageu
+    return request.endpoint in ('static', 'assets')
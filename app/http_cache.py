@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from .rendering import RENDER_VERSION
+
+# Uvjetni GET (ETag / If-None-Match) za stranice s bilješkama.
+# ETag se računa iz verzije bilješki (app.stats), korisnika i URL-a, bez
+# dohvaćanja bilješki i renderiranja, pa je odgovor 304 jedan dohvat po _id.
+
+
+def _etag(version):
+    parts = [
+        current_app.config['HTTP_CACHE_SALT'],
+        RENDER_VERSION,
+        current_user.id,
+        current_user.username,
+        ','.join(sorted(current_user.roles)),
+        request.full_path,
+        version,
+    ]
+    return hashlib.sha256('\0'.join(map(str, parts)).encode('utf-8')).hexdigest()[:32]
+
+
+def _private(response):
+    # sadržaj ovisi o prijavljenom korisniku: samo cache preglednika,
+    # uz provjeru pri svakom prikazu
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def conditional_get(version):
+    """
+    Dekorator za GET rute s bilješkama. version(**kwargs rute) vraća vrijednost
+    koja se mijenja kad god se promijeni sadržaj stranice. Ako klijent pošalje
+    isti ETag, vraća se 304 bez poziva rute.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # flash poruke moraju se prikazati, pa se takva stranica uvijek renderira
+            if (request.method != 'GET' or not current_app.config['HTTP_CACHE_ENABLED']
+                    or session.get('_flashes')):
+                return f(*args, **kwargs)
+
+            etag = _etag(version(**kwargs))
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            return _private(response)
+        return decorated_function
+    return decorator
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from .extensions import mongo
+from .startup import run_once
+from .search import TITLE_WEIGHT, CONTENT_WEIGHT
+
+# Deklarativni popis indeksa po kolekcijama. Pri dodavanju novog upita
+# ovdje dodati indeks; verzija registra se mijenja pa se indeksi
+# ponovno provjeravaju pri idućem startu aplikacije.
+INDEXES = {
+    'users': [
+        # User.get_by_username / get_by_email i validatori registracije
+        IndexModel([('username', ASCENDING)], name='username_unique', unique=True),
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+    ],
+    'notes': [
+        # list_notes: {'user_id': ...} sortirano po (created_at, _id) silazno
+        IndexModel(
+            [('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+            name='user_created_at'
+        ),
+        # admin_dashboard: sve bilješke po (created_at, _id) silazno
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_at'),
+        # pretraživanje, SEARCH_BACKEND='text' (bez stemminga, hrvatski nije podržan)
+        IndexModel(
+            [('title', TEXT), ('content', TEXT)],
+            name='notes_text',
+            weights={'title': TITLE_WEIGHT, 'content': CONTENT_WEIGHT},
+            default_language='none'
+        ),
+        # pretraživanje, SEARCH_BACKEND='terms': invertirani indeks nad tokenima
+        IndexModel(
+            [('user_id', ASCENDING), ('search_terms', ASCENDING)],
+            name='user_search_terms',
+            partialFilterExpression={'search_terms': {'$exists': True}}
+        ),
+        IndexModel(
+            [('search_terms', ASCENDING)],
+            name='search_terms',
+            partialFilterExpression={'search_terms': {'$exists': True}}
+        ),
+    ],
+    'note_revisions': [
+        # povijest bilješke po verziji; rekonstrukcija čita raspon verzija
+        IndexModel([('note_id', ASCENDING), ('rev', DESCENDING)], name='note_rev_unique', unique=True),
+        # revisions-purge: povijest obrisanih bilješki
+        IndexModel([('note_deleted_at', ASCENDING)], name='note_deleted_at', sparse=True),
+    ],
+    'stats': [
+        # admin statistika: korisnici s najviše bilješki
+        IndexModel([('kind', ASCENDING), ('notes', DESCENDING)], name='kind_notes'),
+    ],
+    # rate limiting (app.ratelimit): istekli brojači se brišu po expireAt
+    'ratelimit_counters': [
+        IndexModel([('expireAt', ASCENDING)], name='expire_at_ttl', expireAfterSeconds=0),
+    ],
+    'ratelimit_windows': [
+        IndexModel([('expireAt', ASCENDING)], name='expire_at_ttl', expireAfterSeconds=0),
+    ],
+    'mail_outbox': [
+        # periodična provjera poruka za (ponovno) slanje
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)], name='status_next_attempt'),
+        # poslane poruke se brišu nakon 7 dana
+        IndexModel([('sent_at', ASCENDING)], name='sent_at_ttl', expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+
+def registry_version():
+    spec = {
+        collection: [model.document for model in models]
+        for collection, models in sorted(INDEXES.items())
+    }
+    raw = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def ensure_indexes():
+    """
+    Kreira sve indekse iz registra (idempotentno: postojeći se preskaču).
+    """
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                mongo.db[collection].create_indexes([model])
+            except OperationFailure as e:
+                # npr. duplikati u postojećim podacima ili indeks istih ključeva pod drugim imenom
+                current_app.logger.error(
+                    "Indeks %s.%s nije kreiran: %s", collection, model.document['name'], e
+                )
+
+
+def ensure_indexes_once():
+    """
+    Poziva se iz create_app(): indekse kreira samo prvi worker nakon promjene registra.
+    """
+    return run_once('indexes', registry_version(), ensure_indexes)
+
+
+def index_report():
+    """
+    Vraća listu (kolekcija, indeks, status, broj korištenja) za postojeće i nedostajuće indekse.
+    """
+    rows = []
+    for collection, models in INDEXES.items():
+        coll = mongo.db[collection]
+        expected = {model.document['name'] for model in models}
+        try:
+            usage = {s['name']: s['accesses']['ops'] for s in coll.aggregate([{'$indexStats': {}}])}
+        except OperationFailure:
+            usage = {}
+        existing = set(coll.index_information())
+
+        for name in sorted(expected - existing):
+            rows.append((collection, name, 'missing', None))
+        for name in sorted(existing):
+            if name == '_id_':
+                continue
+            ops = usage.get(name)
+            if name not in expected:
+                status = 'unmanaged'
+            elif ops == 0:
+                status = 'unused'
+            else:
+                status = 'ok'
+            rows.append((collection, name, status, ops))
+    return rows
+
+
+@click.group('indexes')
+def indexes_cli():
+    """Upravljanje MongoDB indeksima."""
+
+
+@indexes_cli.command('ensure')
+@with_appcontext
+def ensure_command():
+    """Kreira sve indekse iz registra, bez obzira na spremljenu verziju."""
+    ensure_indexes()
+    click.echo(f'Indeksi provjereni (verzija registra {registry_version()}).')
+
+
+@indexes_cli.command('report')
+@with_appcontext
+def report_command():
+    """Ispisuje nedostajuće, nekorištene i neregistrirane indekse."""
+    for collection, name, status, ops in index_report():
+        ops = '-' if ops is None else ops
+        click.echo(f'{collection:<10} {name:<20} {status:<10} ops={ops}')
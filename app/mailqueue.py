@@ -0,0 +1,219 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message
+from pymongo import ReturnDocument
+from .extensions import mongo, mail
+
+# Asinkrono slanje maila. Poruka se prvo sprema u kolekciju 'mail_outbox'
+# (preživljava restart), a zatim je iz ograničenog reda u memoriji šalju
+# pozadinske dretve, u serijama preko jedne SMTP veze (mail.connect()).
+# Neuspjela slanja se ponavljaju s eksponencijalnim odmakom.
+#
+# Lokalno testiranje bez pravog SMTP-a, npr. s aiosmtpd:
+#     python -m aiosmtpd -n -l localhost:8025
+#     MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=False flask run
+
+
+class MailQueue:
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['mail_queue'] = self
+        # Dretve se pokreću tek u workeru (nakon forka), pri prvom zahtjevu
+        app.before_request(self._ensure_started)
+
+    @property
+    def outbox(self):
+        return mongo.db.mail_outbox
+
+    def send(self, msg):
+        """
+        Sprema poruku u outbox i stavlja je u red za slanje.
+        Ako je MAIL_QUEUE_ENABLED isključen, šalje se odmah (sinkrono).
+        """
+        config = current_app.config
+        if not config['MAIL_QUEUE_ENABLED']:
+            mail.send(msg)
+            return None
+
+        now = datetime.utcnow()
+        doc = {
+            'subject': msg.subject,
+            'recipients': list(msg.recipients),
+            'sender': msg.sender,
+            'body': msg.body,
+            'html': msg.html,
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now,
+        }
+        mail_id = self.outbox.insert_one(doc).inserted_id
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(mail_id)
+        except queue.Full:
+            # ostaje u outboxu, pokupit će je periodična provjera
+            current_app.logger.warning("Red za mail je pun, poruka %s čeka u outboxu.", mail_id)
+        return mail_id
+
+    def flush(self):
+        """
+        Sinkrono šalje sve poruke iz outboxa kojima je došlo vrijeme slanja.
+        """
+        ids = [d['_id'] for d in self.outbox.find(
+            {'status': 'pending', 'next_attempt_at': {'$lte': datetime.utcnow()}}, {'_id': 1}
+        )]
+        batch_size = current_app.config['MAIL_QUEUE_BATCH_SIZE']
+        for i in range(0, len(ids), batch_size):
+            self._deliver(ids[i:i + batch_size])
+        return len(ids)
+
+    def _ensure_started(self):
+        # pid provjera: nakon forka dretve iz roditelja ne postoje
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            config = self.app.config
+            if not config['MAIL_QUEUE_ENABLED']:
+                return
+            self._queue = queue.Queue(maxsize=config['MAIL_QUEUE_SIZE'])
+            for i in range(config['MAIL_QUEUE_WORKERS']):
+                threading.Thread(target=self._worker, name=f'mail-worker-{i}', daemon=True).start()
+            threading.Thread(target=self._sweeper, name='mail-sweeper', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _worker(self):
+        batch_size = self.app.config['MAIL_QUEUE_BATCH_SIZE']
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                try:
+                    self._deliver(batch)
+                except Exception as e:
+                    current_app.logger.exception("Greška u slanju maila: %s", e)
+
+    def _sweeper(self):
+        interval = self.app.config['MAIL_QUEUE_POLL_INTERVAL']
+        while True:
+            time.sleep(interval)
+            with self.app.app_context():
+                try:
+                    self._requeue_due()
+                except Exception as e:
+                    current_app.logger.exception("Greška pri provjeri outboxa: %s", e)
+
+    def _requeue_due(self):
+        now = datetime.utcnow()
+        # poruke koje je preuzeo worker koji je u međuvremenu pao
+        self.outbox.update_many(
+            {'status': 'sending', 'locked_until': {'$lt': now}},
+            {'$set': {'status': 'pending'}}
+        )
+        free = self._queue.maxsize - self._queue.qsize()
+        if free <= 0:
+            return
+        for doc in self.outbox.find(
+            {'status': 'pending', 'next_attempt_at': {'$lte': now}}, {'_id': 1}
+        ).sort('next_attempt_at', 1).limit(free):
+            try:
+                self._queue.put_nowait(doc['_id'])
+            except queue.Full:
+                break
+
+    def _claim(self, mail_id):
+        # atomsko preuzimanje, ista poruka se ne šalje iz dva workera
+        lease = timedelta(seconds=current_app.config['MAIL_QUEUE_LEASE'])
+        return self.outbox.find_one_and_update(
+            {'_id': mail_id, 'status': 'pending'},
+            {'$set': {'status': 'sending', 'locked_until': datetime.utcnow() + lease}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _deliver(self, mail_ids):
+        docs = [doc for doc in (self._claim(mail_id) for mail_id in mail_ids) if doc]
+        if not docs:
+            return
+        pending = list(docs)
+        try:
+            # jedna SMTP veza (connect + TLS + login) za cijelu seriju
+            with mail.connect() as conn:
+                while pending:
+                    doc = pending.pop(0)
+                    try:
+                        conn.send(self._to_message(doc))
+                    except Exception as e:
+                        self._mark_failed(doc, e)
+                    else:
+                        self._mark_sent(doc)
+        except Exception as e:
+            for doc in pending:
+                self._mark_failed(doc, e)
+
+    @staticmethod
+    def _to_message(doc):
+        return Message(
+            subject=doc['subject'],
+            recipients=doc['recipients'],
+            body=doc.get('body'),
+            html=doc.get('html'),
+            sender=doc.get('sender')
+        )
+
+    def _mark_sent(self, doc):
+        self.outbox.update_one(
+            {'_id': doc['_id']},
+            {'$set': {'status': 'sent', 'sent_at': datetime.utcnow()}, '$unset': {'locked_until': ''}}
+        )
+
+    def _mark_failed(self, doc, error):
+        config = current_app.config
+        attempts = doc.get('attempts', 0) + 1
+        update = {'attempts': attempts, 'last_error': str(error)}
+        if attempts >= config['MAIL_QUEUE_MAX_RETRIES']:
+            update['status'] = 'failed'
+            current_app.logger.error("Mail %s nije poslan nakon %d pokušaja: %s", doc['_id'], attempts, error)
+        else:
+            delay = config['MAIL_QUEUE_BACKOFF'] * 2 ** (attempts - 1)
+            update['status'] = 'pending'
+            update['next_attempt_at'] = datetime.utcnow() + timedelta(seconds=delay)
+            current_app.logger.warning("Mail %s: pokušaj %d nije uspio (%s), ponovno za %ds.",
+                                       doc['_id'], attempts, error, delay)
+        self.outbox.update_one({'_id': doc['_id']}, {'$set': update, '$unset': {'locked_until': ''}})
+
+
+mail_queue = MailQueue()
+
+
+@click.group('mail')
+def mail_cli():
+    """Upravljanje redom za slanje maila."""
+
+
+@mail_cli.command('flush')
+@with_appcontext
+def flush_command():
+    """Odmah šalje sve poruke iz outboxa kojima je došlo vrijeme slanja."""
+    count = mail_queue.flush()
+    click.echo(f'Obrađeno poruka: {count}')
@@ -1,8 +1,55 @@
-from flask import render_template
+import os
+import time
+import hmac
+from flask import render_template, jsonify, request, current_app, abort
 from flask_login import login_required, current_user
 from . import main_bp
+from ..extensions import mongo, limiter
+from ..monitoring import pool_metrics, limiter_metrics, request_metrics
 
 @main_bp.route('/')
 @login_required
 def index():
     return render_template('index.html')
+
+def _metrics_authorized():
+    # METRICS_TOKEN kao Bearer token; bez tokena samo uz izričit METRICS_PUBLIC
+    if current_app.config['METRICS_PUBLIC']:
+        return True
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return False
+    expected = f'Bearer {token}'.encode('utf-8')
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'), expected)
+
+@main_bp.route('/health')
+@limiter.exempt
+def health():
+    # Health check; metrike poola i limitera ovog workera samo uz pristup
+    # kao za /metrics (detalji greške idu samo u log)
+    started = time.perf_counter()
+    try:
+        mongo.cx.admin.command('ping')
+        status, code = 'ok', 200
+    except Exception:
+        current_app.logger.exception('Health check: MongoDB ping nije uspio')
+        status, code = 'error', 503
+    body = {'status': status}
+    if _metrics_authorized():
+        body.update({
+            'pid': os.getpid(),
+            'mongo_ping_ms': round((time.perf_counter() - started) * 1000, 3),
+            'mongo_pool': pool_metrics.stats(),
+            'rate_limiter': limiter_metrics.stats(),
+        })
+    return jsonify(body), code
+
+@main_bp.route('/metrics')
+@limiter.exempt
+def metrics():
+    # Prometheus metrike ovog workera (svaki gunicorn worker ima svoje brojače)
+    if not _metrics_authorized():
+        abort(403 if current_app.config['METRICS_TOKEN'] else 404)
+    return current_app.response_class(
+        request_metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,10 +1,30 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+import copy
 from flask_login import UserMixin
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
 from .extensions import mongo
-from flask import current_app
+from .cache import LRUCache
+from .passwords import password_hasher, PasswordHasherBusy
+from .stats import record_user_created
+from flask import current_app, g, has_request_context
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
+# Polja potrebna za prijavu i sesiju (bez ostatka dokumenta)
+LOGIN_PROJECTION = {
+    'username': 1,
+    'email': 1,
+    'password_hash': 1,
+    'email_confirmed': 1,
+    'roles': 1,
+}
+
+# Polja korisnika koja se drže u sesijskom cacheu (bez password_hash)
+SESSION_PROJECTION = {'password_hash': 0}
+
+# Cache korisničkih dokumenata za user_loader (po workeru).
+# Granice i TTL se postavljaju iz Configa u create_app().
+user_cache = LRUCache(max_entries=1024, ttl=60)
+
 class User(UserMixin):
     def __init__(self, data):
         # data is document from MongoDB
@@ -51,6 +71,48 @@ class User(UserMixin):
             return User(doc)
         return None
 
+    @staticmethod
+    def load_for_session(user_id):
+        """
+        Učitava korisnika za flask-login user_loader.
+        Redoslijed: memo unutar zahtjeva (g) -> TTL/LRU cache procesa -> MongoDB.
+        Dokument se dohvaća bez password_hash.
+        """
+        if not current_app.config.get('USER_CACHE_ENABLED', True):
+            return User.get_by_id(user_id)
+
+        memo = None
+        if has_request_context():
+            memo = g.setdefault('_user_memo', {})
+            if user_id in memo:
+                return memo[user_id]
+
+        doc = user_cache.get(user_id)
+        if doc is None:
+            try:
+                doc = mongo.db.users.find_one({'_id': ObjectId(user_id)}, SESSION_PROJECTION)
+            except Exception:
+                return None
+            if doc:
+                user_cache.set(user_id, doc)
+
+        # kopija da izmjene na objektu (npr. add_role) ne mijenjaju cache
+        user = User(copy.deepcopy(doc)) if doc else None
+        if memo is not None:
+            memo[user_id] = user
+        return user
+
+    @staticmethod
+    def invalidate_cache(user_id):
+        """
+        Briše korisnika iz cachea; pozvati nakon svake izmjene korisničkog dokumenta.
+        Ostali workeri vide izmjenu najkasnije nakon USER_CACHE_TTL sekundi.
+        """
+        user_id = str(user_id)
+        user_cache.pop(user_id)
+        if has_request_context():
+            g.get('_user_memo', {}).pop(user_id, None)
+
     @staticmethod
     def get_by_username(username):
         doc = mongo.db.users.find_one({'username': username})
@@ -65,6 +127,43 @@ class User(UserMixin):
             return User(doc)
         return None
 
+    @staticmethod
+    def find_by_login(identifier):
+        """
+        Traži korisnika po korisničkom imenu ili emailu u jednom upitu.
+        Ako se identifikator poklapa s korisničkim imenom jednog i emailom
+        drugog korisnika, prednost ima korisničko ime.
+        """
+        if not identifier:
+            return None
+        docs = list(mongo.db.users.find(
+            {'$or': [{'username': identifier}, {'email': identifier}]},
+            LOGIN_PROJECTION
+        ).limit(2))
+        if not docs:
+            return None
+        for doc in docs:
+            if doc.get('username') == identifier:
+                return User(doc)
+        return User(docs[0])
+
+    @staticmethod
+    def find_conflicts(username, email):
+        """
+        Provjera jedinstvenosti za registraciju u jednom upitu.
+        Vraća skup zauzetih polja, npr. {'username', 'email'}.
+        """
+        taken = set()
+        for doc in mongo.db.users.find(
+            {'$or': [{'username': username}, {'email': email}]},
+            {'username': 1, 'email': 1}
+        ).limit(2):
+            if doc.get('username') == username:
+                taken.add('username')
+            if doc.get('email') == email:
+                taken.add('email')
+        return taken
+
     @staticmethod
     def create(username, email, password, roles=None):
         """
@@ -73,7 +172,7 @@ class User(UserMixin):
         """
         if roles is None:
             roles = []
-        password_hash = generate_password_hash(password)
+        password_hash = password_hasher.hash(password)
         user_doc = {
             'username': username,
             'email': email,
@@ -83,6 +182,7 @@ class User(UserMixin):
         }
         result = mongo.db.users.insert_one(user_doc)
         user_doc['_id'] = result.inserted_id
+        record_user_created(result.inserted_id, username)
         return User(user_doc)
 
     def add_role(self, role):
@@ -91,6 +191,7 @@ class User(UserMixin):
         """
         if role not in self.roles:
             mongo.db.users.update_one({'_id': ObjectId(self._data['_id'])}, {'$addToSet': {'roles': role}})
+            User.invalidate_cache(self.id)
             # također update lokalni objekt
             self._data.setdefault('roles', [])
             if role not in self._data['roles']:
@@ -102,7 +203,29 @@ class User(UserMixin):
         return role in self.roles
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Provjerava lozinku; hash napravljen starom metodom ili parametrima
+        (PASSWORD_HASH_METHOD) zamjenjuje se novim dok je lozinka poznata.
+        """
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        if password_hasher.needs_rehash(self.password_hash):
+            try:
+                self.rehash_password(password)
+            except (PasswordHasherBusy, PyMongoError):
+                # prijava uspijeva i bez zamjene; pokušava se pri sljedećoj prijavi
+                current_app.logger.warning('Zamjena hasha lozinke za %s nije uspjela', self.id, exc_info=True)
+        return True
+
+    def rehash_password(self, password):
+        old_hash = self.password_hash
+        new_hash = password_hasher.hash(password)
+        # uvjet na stari hash: ne prepisuje lozinku promijenjenu u međuvremenu
+        mongo.db.users.update_one(
+            {'_id': ObjectId(self._data['_id']), 'password_hash': old_hash},
+            {'$set': {'password_hash': new_hash}}
+        )
+        self._data['password_hash'] = new_hash
 
     def generate_confirmation_token(self):
         """
@@ -131,5 +254,6 @@ class User(UserMixin):
         Set email_confirmed to True in DB and update local object.
         """
         mongo.db.users.update_one({'_id': ObjectId(self._data['_id'])}, {'$set': {'email_confirmed': True}})
+        User.invalidate_cache(self.id)
         self._data['email_confirmed'] = True
         return True
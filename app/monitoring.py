@@ -0,0 +1,442 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from flask import request, before_render_template, template_rendered
+from pymongo import monitoring
+
+# Metrike po procesu (gunicorn worker): pymongo listeneri (registriraju se pri
+# kreiranju MongoClienta u create_app() preko 'event_listeners'), rate limiter
+# i mjerenje zahtjeva (Server-Timing, /metrics, log sporih zahtjeva i upita).
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Prati connection pool: koliko je veza u upotrebi i koliko se čeka
+    na slobodnu vezu (checkout wait).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.in_use = 0
+            self.max_in_use = 0
+            self.open_connections = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.pools_cleared = 0
+
+    # checkout se odvija u dretvi koja izvršava upit, pa je početak
+    # čekanja dovoljno zapamtiti po dretvi
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'started', None)
+        wait = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'open_connections': self.open_connections,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checkout_wait_ms_avg': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'checkout_wait_ms_max': round(self.wait_max * 1000, 3),
+                'pools_cleared': self.pools_cleared,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class LimiterMetrics:
+    """
+    Trajanje provjere rate limita po zahtjevu (Flask-Limiter + storage),
+    broj zahtjeva odbijenih s 429. Puni ga extensions.Limiter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.breaches = 0
+            self.time_total = 0.0
+            self.time_max = 0.0
+
+    def observe(self, seconds, breached=False):
+        with self._lock:
+            self.requests += 1
+            self.breaches += 1 if breached else 0
+            self.time_total += seconds
+            self.time_max = max(self.time_max, seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'breaches': self.breaches,
+                'overhead_ms_avg': round(self.time_total / self.requests * 1000, 3) if self.requests else 0.0,
+                'overhead_ms_max': round(self.time_max * 1000, 3),
+            }
+
+
+limiter_metrics = LimiterMetrics()
+
+
+# Mjerenje zahtjeva. Vrijeme se zbraja po dijelovima zahtjeva:
+#   db   Mongo naredbe (CommandMetrics)
+#   tpl  renderiranje predloška (kod streaminga uključuje i čitanje iz baze)
+#   md   Markdown filter (markdown_to_html)
+#   san  sanitize_html
+# Dijelovi se mogu preklapati (npr. md unutar tpl). Zahtjev koji se trenutno
+# obrađuje vezan je uz dretvu, jer se i Mongo naredbe izvršavaju u njoj.
+
+_local = threading.local()
+slow_log = logging.getLogger('app.slow')
+
+# granice histograma trajanja zahtjeva (sekunde)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTimings:
+    __slots__ = ('started', 'sections', 'templates', 'endpoint', 'method', 'path', 'status', 'streamed')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections = {}  # naziv -> [broj, sekunde]
+        self.templates = []
+        self.endpoint = self.method = self.path = self.status = None
+        self.streamed = False
+
+    def describe(self, status):
+        self.endpoint = request.endpoint or 'none'
+        self.method = request.method
+        self.path = request.path
+        self.status = status
+
+    def add(self, section, seconds):
+        entry = self.sections.get(section)
+        if entry is None:
+            self.sections[section] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def timed(section):
+    """
+    Dodaje trajanje bloka dijelu `section` zahtjeva koji se trenutno obrađuje
+    (izvan zahtjeva ne radi ništa).
+    """
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(section, time.perf_counter() - started)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Broj i trajanje Mongo naredbi po vrsti (find, insert, aggregate...),
+    vrijeme u bazi po zahtjevu i log sporih upita.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.slow_ms = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.commands = {}  # naredba -> [broj, sekunde, neuspjele]
+
+    def started(self, event):
+        if self.slow_ms is None:
+            return
+        # kolekcija je vrijednost prvog ključa naredbe ({'find': 'notes', ...})
+        collection = event.command.get(event.command_name)
+        self._started[event.request_id] = collection if isinstance(collection, str) else None
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        collection = self._started.pop(event.request_id, None)
+        with self._lock:
+            entry = self.commands.setdefault(event.command_name, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += 1 if failed else 0
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.add('db', seconds)
+        if self.slow_ms is not None and seconds * 1000 >= self.slow_ms:
+            slow_log.warning(json.dumps({
+                'event': 'slow_query',
+                'command': event.command_name,
+                'database': event.database_name,
+                'collection': collection,
+                'duration_ms': round(seconds * 1000, 3),
+                'failed': failed,
+                'endpoint': _current_endpoint(),
+            }))
+
+    def stats(self):
+        with self._lock:
+            return {name: list(entry) for name, entry in self.commands.items()}
+
+
+def _current_endpoint():
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        return None
+    # kod streaminga naredbe stižu nakon teardowna, kad request više nije dostupan
+    return timings.endpoint or request.endpoint
+
+
+class RequestMetrics:
+    """
+    Mjerenje zahtjeva: postavlja RequestTimings za svaki zahtjev, dodaje
+    Server-Timing zaglavlje, skuplja metrike po endpointu za /metrics i
+    zapisuje spore zahtjeve u log 'app.slow' (jedan JSON objekt po retku).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.server_timing = False
+        self.slow_request_ms = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}   # (endpoint, metoda, status) -> broj
+            self.durations = {}  # endpoint -> [brojači po granicama, zbroj, broj]
+            self.sections = {}   # dio -> [broj, sekunde]
+
+    def init_app(self, app):
+        self.enabled = app.config['MONITORING_ENABLED']
+        if not self.enabled:
+            return
+        self.server_timing = app.config['SERVER_TIMING_ENABLED']
+        self.slow_request_ms = app.config['SLOW_REQUEST_MS']
+        command_metrics.slow_ms = app.config['SLOW_QUERY_MS']
+        app.before_request(self._start)
+        app.after_request(self._after)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+
+    def _start(self):
+        _local.timings = RequestTimings()
+
+    def _template_started(self, sender, template, context, **extra):
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.templates.append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        timings = getattr(_local, 'timings', None)
+        if timings is not None and timings.templates:
+            timings.add('tpl', time.perf_counter() - timings.templates.pop())
+
+    def _after(self, response):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return response
+        timings.describe(response.status_code)
+        if response.is_streamed:
+            # tijelo se generira nakon teardowna; mjerenje završava kad se odgovor zatvori
+            timings.streamed = True
+            response.call_on_close(lambda: self._record(timings))
+        if self.server_timing:
+            # streamani odgovor šalje zaglavlja prije tijela: sadrži samo ono izmjereno do tada
+            parts = [
+                f'{name};dur={seconds * 1000:.2f};desc="{count}x"'
+                for name, (count, seconds) in timings.sections.items()
+            ]
+            parts.append(f'app;dur={timings.elapsed() * 1000:.2f}')
+            response.headers['Server-Timing'] = ', '.join(parts)
+        return response
+
+    def _finish(self, exc=None):
+        timings = getattr(_local, 'timings', None)
+        if timings is None or timings.streamed:
+            return
+        if timings.status is None:
+            # after_request se nije izvršio (neobrađena iznimka)
+            timings.describe(500 if exc is not None else 200)
+        self._record(timings)
+
+    def _record(self, timings):
+        if getattr(_local, 'timings', None) is timings:
+            _local.timings = None
+        seconds = timings.elapsed()
+        endpoint = timings.endpoint
+        status = timings.status
+        with self._lock:
+            key = (endpoint, timings.method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.durations.get(endpoint)
+            if histogram is None:
+                histogram = self.durations[endpoint] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            for name, (count, section_seconds) in timings.sections.items():
+                entry = self.sections.setdefault(name, [0, 0.0])
+                entry[0] += count
+                entry[1] += section_seconds
+
+        if self.slow_request_ms is not None and seconds * 1000 >= self.slow_request_ms:
+            record = {
+                'event': 'slow_request',
+                'endpoint': endpoint,
+                'method': timings.method,
+                'path': timings.path,
+                'status': status,
+                'duration_ms': round(seconds * 1000, 3),
+            }
+            for name, (count, section_seconds) in timings.sections.items():
+                record[f'{name}_ms'] = round(section_seconds * 1000, 3)
+                record[f'{name}_count'] = count
+            slow_log.warning(json.dumps(record))
+
+    def render_prometheus(self):
+        """
+        Metrike ovog procesa u Prometheus text formatu (verzija 0.0.4).
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels)
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        with self._lock:
+            requests = sorted(self.requests.items())
+            durations = sorted((endpoint, [list(h[0]), h[1], h[2]]) for endpoint, h in self.durations.items())
+            sections = sorted((name, list(entry)) for name, entry in self.sections.items())
+        commands = sorted(command_metrics.stats().items())
+
+        metric('app_http_requests_total', 'counter', 'Broj zahtjeva po endpointu, metodi i statusu.', [
+            ((('endpoint', endpoint), ('method', method), ('status', status)), count)
+            for (endpoint, method, status), count in requests
+        ])
+        lines.append('# HELP app_http_request_duration_seconds Trajanje zahtjeva po endpointu.')
+        lines.append('# TYPE app_http_request_duration_seconds histogram')
+        for endpoint, (buckets, total, count) in durations:
+            label = _label(endpoint)
+            for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'app_http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {bucket_count}')
+            lines.append(f'app_http_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {count}')
+            lines.append(f'app_http_request_duration_seconds_sum{{endpoint="{label}"}} {total}')
+            lines.append(f'app_http_request_duration_seconds_count{{endpoint="{label}"}} {count}')
+        metric('app_request_section_seconds_total', 'counter', 'Vrijeme po dijelu zahtjeva (db, tpl, md, san).', [
+            ((('section', name),), seconds) for name, (_, seconds) in sections
+        ])
+        metric('app_request_section_calls_total', 'counter', 'Broj poziva po dijelu zahtjeva.', [
+            ((('section', name),), count) for name, (count, _) in sections
+        ])
+        metric('app_mongo_commands_total', 'counter', 'Broj Mongo naredbi.', [
+            ((('command', name),), entry[0]) for name, entry in commands
+        ])
+        metric('app_mongo_command_seconds_total', 'counter', 'Ukupno trajanje Mongo naredbi.', [
+            ((('command', name),), entry[1]) for name, entry in commands
+        ])
+        metric('app_mongo_command_failures_total', 'counter', 'Neuspjele Mongo naredbe.', [
+            ((('command', name),), entry[2]) for name, entry in commands
+        ])
+
+        pool = pool_metrics.stats()
+        metric('app_mongo_pool_in_use', 'gauge', 'Veze iz poola u upotrebi.', [((), pool['in_use'])])
+        metric('app_mongo_pool_open_connections', 'gauge', 'Otvorene veze.', [((), pool['open_connections'])])
+        metric('app_mongo_pool_checkout_wait_seconds_max', 'gauge', 'Najdulje čekanje na vezu.', [
+            ((), pool['checkout_wait_ms_max'] / 1000)
+        ])
+        with limiter_metrics._lock:
+            limiter = (limiter_metrics.requests, limiter_metrics.breaches, limiter_metrics.time_total)
+        metric('app_ratelimit_checks_total', 'counter', 'Zahtjevi provjereni rate limiterom.', [((), limiter[0])])
+        metric('app_ratelimit_breaches_total', 'counter', 'Zahtjevi odbijeni s 429.', [((), limiter[1])])
+        metric('app_ratelimit_seconds_total', 'counter', 'Ukupno trajanje provjera limita.', [((), limiter[2])])
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+command_metrics = CommandMetrics()
+request_metrics = RequestMetrics()
@@ -0,0 +1,79 @@
+import click
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from . import notes_bp
+from ..extensions import mongo
+from ..rendering import RENDER_VERSION, rendered_fields, content_hash
+from ..search import search_fields
+from . import revisions
+
+
+@notes_bp.cli.command('render-backfill')
+@click.option('--batch-size', default=500, show_default=True, help='Broj bilješki po bulk upisu.')
+@click.option('--verify', is_flag=True, help='Provjeri hash sadržaja i kod bilješki s trenutnom verzijom.')
+def render_backfill(batch_size, verify):
+    """
+    Sprema renderirani HTML za bilješke koje ga nemaju ili su renderirane
+    starijom verzijom renderera. Može se pokretati dok aplikacija radi.
+    """
+    query = {} if verify else {'render_version': {'$ne': RENDER_VERSION}}
+    cursor = mongo.db.notes.find(
+        query,
+        {'content': 1, 'content_hash': 1, 'render_version': 1}
+    ).batch_size(batch_size)
+
+    ops = []
+    updated = 0
+    for note in cursor:
+        content = note.get('content') or ''
+        if note.get('render_version') == RENDER_VERSION and note.get('content_hash') == content_hash(content):
+            continue
+        # Uvjet na 'content' sprječava prepisivanje bilješke uređene u međuvremenu
+        ops.append(UpdateOne(
+            {'_id': note['_id'], 'content': note.get('content')},
+            {'$set': rendered_fields(content)}
+        ))
+        if len(ops) >= batch_size:
+            updated += mongo.db.notes.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += mongo.db.notes.bulk_write(ops, ordered=False).modified_count
+
+    click.echo(f'Renderirano bilješki: {updated} (verzija {RENDER_VERSION}).')
+
+
+@notes_bp.cli.command('search-reindex')
+@click.option('--batch-size', default=500, show_default=True, help='Broj bilješki po bulk upisu.')
+def search_reindex(batch_size):
+    """
+    Ponovno računa tokene za SEARCH_BACKEND='terms' za sve bilješke
+    (ili ih uklanja ako je backend 'text').
+    """
+    cursor = mongo.db.notes.find({}, {'title': 1, 'content': 1}).batch_size(batch_size)
+    ops = []
+    updated = 0
+    for note in cursor:
+        fields = search_fields(note.get('title'), note.get('content'))
+        if fields:
+            update = {'$set': fields}
+        else:
+            update = {'$unset': {'search_terms': '', 'search_title_terms': ''}}
+        ops.append(UpdateOne({'_id': note['_id']}, update))
+        if len(ops) >= batch_size:
+            updated += mongo.db.notes.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += mongo.db.notes.bulk_write(ops, ordered=False).modified_count
+
+    click.echo(f'Ažurirano bilješki: {updated}.')
+
+
+@notes_bp.cli.command('revisions-purge')
+@click.option('--older-than', default=365, show_default=True, help='Dana od brisanja bilješke.')
+@click.confirmation_option(prompt='Trajno obrisati povijest obrisanih bilješki?')
+def revisions_purge(older_than):
+    """
+    Trajno briše povijest izmjena bilješki obrisanih prije više od --older-than dana.
+    """
+    deleted = revisions.purge_deleted(datetime.utcnow() - timedelta(days=older_than))
+    click.echo(f'Obrisano revizija: {deleted}.')
@@ -0,0 +1,165 @@
+import difflib
+import json
+import zlib
+from datetime import datetime
+from bson.binary import Binary
+from flask import current_app
+from pymongo.errors import BulkWriteError
+from ..extensions import mongo
+
+# Povijest izmjena bilješki (kolekcija note_revisions).
+#
+# Bilješka drži trenutni sadržaj i brojač 'revision' (broj spremanja, bez
+# polja = 0). Pri svakom spremanju zamijenjena verzija k sprema se kao
+# obrnuta delta prema novom sadržaju (koji je uvijek poznat pri upisu, pa
+# stari sadržaj ne treba posebno čitati), komprimirana zlibom. Svaka
+# REVISIONS_SNAPSHOT_INTERVAL-ta verzija sprema se cijela, pa rekonstrukcija
+# primjenjuje najviše interval-1 delti od najbliže novije snimke. Vrsta
+# zapisa ('kind') se čita iz baze, pa promjena intervala ne kvari postojeću
+# povijest.
+#
+# Brisanjem bilješke povijest ostaje (audit): zadnja verzija se sprema kao
+# snimka, a sve revisije dobivaju note_deleted_at. Trajno brisanje je
+# `flask notes revisions-purge`.
+
+COLLECTION = 'note_revisions'
+
+# popis revizija bez komprimiranih podataka
+LIST_PROJECTION = {'data': 0}
+
+
+def _encode(payload):
+    return Binary(zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')))
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def make_delta(new, old):
+    """
+    Delta koja iz novog sadržaja gradi stari: lista [početak, kraj] (retci
+    novog sadržaja koji se zadržavaju) i stringova (umetnuti tekst).
+    """
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(old_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(new, ops):
+    new_lines = new.splitlines(keepends=True)
+    return ''.join(op if isinstance(op, str) else ''.join(new_lines[op[0]:op[1]]) for op in ops)
+
+
+class RevisionChainError(Exception):
+    """U povijesti nedostaje revizija potrebna za rekonstrukciju verzije."""
+
+
+def revision_doc(note_id, rev, before, title, content, editor, at=None, snapshot=False):
+    """
+    Dokument revizije za verziju rev (prije izmjene: before) koja se
+    zamjenjuje naslovom i sadržajem title/content.
+    """
+    old_content = before.get('content') or ''
+    if snapshot or rev % current_app.config['REVISIONS_SNAPSHOT_INTERVAL'] == 0:
+        kind, data = 'snapshot', _encode(old_content)
+    else:
+        kind, data = 'delta', _encode(make_delta(content or '', old_content))
+    return {
+        'note_id': note_id,
+        'rev': rev,
+        'title': before.get('title', ''),
+        'kind': kind,
+        'data': data,
+        'size': len(old_content.encode('utf-8')),
+        'stored_size': len(data),
+        # kad je verzija zamijenjena i tko ju je zamijenio
+        'replaced_at': at or datetime.utcnow(),
+        'replaced_by': editor[1] if editor else None,
+        'replaced_by_id': editor[0] if editor else None,
+    }
+
+
+def list_revisions(note_id):
+    return list(mongo.db[COLLECTION].find({'note_id': note_id}, LIST_PROJECTION).sort('rev', -1))
+
+
+def get_revision(note, rev):
+    """
+    Naslov i sadržaj verzije rev bilješke note (dokument s content i
+    revision). Vraća dict s 'rev', 'title', 'content' ili None ako verzija
+    ne postoji; RevisionChainError ako lanac do nje nije potpun.
+    """
+    current = note.get('revision', 0)
+    if rev == current:
+        return {'rev': rev, 'title': note.get('title', ''), 'content': note.get('content') or '', 'current': True}
+    if not 0 <= rev < current:
+        return None
+
+    # najbliža spremljena snimka na ili iza rev; bez nje polazi se od trenutnog sadržaja
+    collection = mongo.db[COLLECTION]
+    snapshot = collection.find_one(
+        {'note_id': note['_id'], 'kind': 'snapshot', 'rev': {'$gte': rev, '$lt': current}},
+        {'rev': 1},
+        sort=[('rev', 1)]
+    )
+    upper = snapshot['rev'] if snapshot else current - 1
+    docs = list(collection.find({'note_id': note['_id'], 'rev': {'$gte': rev, '$lte': upper}}).sort('rev', -1))
+    if [doc['rev'] for doc in docs] != list(range(upper, rev - 1, -1)):
+        raise RevisionChainError(f'Bilješka {note["_id"]}: nepotpun lanac revizija {rev}..{upper}')
+
+    content = note.get('content') or ''
+    for doc in docs:
+        payload = _decode(doc['data'])
+        content = payload if doc['kind'] == 'snapshot' else apply_delta(content, payload)
+    doc = docs[-1]
+    return {
+        'rev': rev,
+        'title': doc['title'],
+        'content': content,
+        'current': False,
+        'replaced_at': doc.get('replaced_at'),
+        'replaced_by': doc.get('replaced_by'),
+    }
+
+
+def save_revisions(docs):
+    if not docs:
+        return
+    try:
+        mongo.db[COLLECTION].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # isti (note_id, rev) već postoji: dvije istovremene izmjene iste verzije
+        current_app.logger.warning('Revizije bilješki nisu spremljene: %s', e.details.get('writeErrors'))
+
+
+def archive_deleted(notes, editor, at=None):
+    """
+    Čuva povijest obrisanih bilješki: zadnja verzija kao snimka, a sve
+    revizije bilješke označene s note_deleted_at.
+    """
+    if not notes:
+        return
+    at = at or datetime.utcnow()
+    save_revisions([
+        revision_doc(doc['_id'], doc.get('revision', 0), doc, None, None, editor, at, snapshot=True)
+        for doc in notes
+    ])
+    mongo.db[COLLECTION].update_many(
+        {'note_id': {'$in': [doc['_id'] for doc in notes]}},
+        {'$set': {'note_deleted_at': at}}
+    )
+
+
+def purge_deleted(before):
+    """
+    Trajno briše povijest bilješki obrisanih prije datuma before.
+    """
+    return mongo.db[COLLECTION].delete_many({'note_deleted_at': {'$lt': before}}).deleted_count
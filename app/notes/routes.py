@@ -1,19 +1,68 @@
-from flask import render_template, request, redirect, url_for, flash
+import difflib
+import io
+from flask import render_template, request, redirect, url_for, flash, current_app, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from . import notes_bp
-from ..extensions import mongo
-from ..models import User 
+from ..extensions import mongo, limiter
+from ..models import User, user_cache
+from ..ratelimit import config_limit
 from ..utils import role_required, sanitize_html
+from ..pagination import paginate, paginate_pipeline
+from ..rendering import render_cache, render_note_html, render_preview_blocks, PREVIEW_LENGTH
+from ..search import search_notes
+from ..stats import notes_version, read_dashboard
+from ..http_cache import conditional_get
+from ..streaming import render_page, streaming_enabled
+from . import service, transfer, revisions
 from bson.objectid import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
+def _own_notes_version(**kwargs):
+    # ETag stranica s vlastitim bilješkama (vidi app.http_cache)
+    return notes_version(ObjectId(current_user.id))
+
+def _all_notes_version(**kwargs):
+    return notes_version(None)
+
+def _editor():
+    # tko je napravio izmjenu (sprema se u povijest bilješke)
+    return ObjectId(current_user.id), current_user.username
+
 @notes_bp.route('/')
 @login_required
+@conditional_get(_own_notes_version)
 def list_notes():
     # Funkcionalnost za korisnika: prikazuje samo njegove bilješke
-    notes = list(mongo.db.notes.find({'user_id': ObjectId(current_user.id)}).sort('created_at', -1))
-    return render_template('notes/list.html', notes=notes)
+    stream = streaming_enabled()
+    notes = paginate(
+        mongo.db.notes,
+        {'user_id': ObjectId(current_user.id)},
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config['NOTES_PER_PAGE'],
+        lazy=stream,
+        batch_size=current_app.config['STREAM_BATCH_SIZE']
+    )
+    return render_page('notes/list.html', stream=stream, notes=notes)
+
+@notes_bp.route('/search')
+@login_required
+def search():
+    # Pretraživanje vlastitih bilješki; admin s scope=all pretražuje sve bilješke
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    search_all = request.args.get('scope') == 'all' and current_user.has_role('admin')
+
+    results, has_next = search_notes(
+        query,
+        user_id=None if search_all else ObjectId(current_user.id),
+        page=page,
+        per_page=current_app.config['SEARCH_RESULTS_PER_PAGE']
+    )
+    return render_template(
+        'notes/search.html',
+        notes=results, query=query, page=page, has_next=has_next, search_all=search_all
+    )
 
 @notes_bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -31,28 +80,41 @@ def create_note(): # <-- OVO JE ENDPOINT notes.create_note
             flash('Naslov je obavezan.', 'warning')
             return render_template('notes/create.html')
             
-        note = {
-            'user_id': ObjectId(current_user.id),
-            'title': sanitized_title, # Koristimo sanitizirani
-            'content': sanitized_content, # Koristimo sanitizirani
-            'created_at': datetime.utcnow()
-        }
-        mongo.db.notes.insert_one(note)
+        # Koristimo sanitizirane vrijednosti
+        service.insert_note(current_user.id, current_user.username, sanitized_title, sanitized_content)
         flash('Bilješka spremljena.', 'success')
         return redirect(url_for('notes.list_notes'))
     return render_template('notes/create.html')
 
+@notes_bp.route('/preview', methods=['POST'])
+@login_required
+@limiter.limit(config_limit('RATELIMIT_PREVIEW'))
+def preview():
+    # Pregled u editoru: {"content", "known": [hash, ...]} -> HTML po bloku,
+    # isti pipeline kao pri spremanju; za blokove koje klijent već ima samo hash
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('content', ''), str):
+        return jsonify({'error': 'Očekuje se JSON s poljem "content".'}), 400
+    content = data.get('content', '')
+    if len(content.encode('utf-8')) > current_app.config['PREVIEW_MAX_BYTES']:
+        return jsonify({'error': 'Sadržaj je prevelik za pregled.'}), 413
+    known = data.get('known')
+    known = [h for h in known if isinstance(h, str)] if isinstance(known, list) else ()
+    blocks = render_preview_blocks(service.clean(content), known)
+    return jsonify({'blocks': [{'hash': h, 'html': html} for h, html in blocks]})
+
 @notes_bp.route('/edit/<note_id>', methods=['GET', 'POST'])
 @login_required
+@conditional_get(_own_notes_version)
 def edit_note(note_id):
     # Funkcionalnost za korisnika: uređivanje samo vlastite bilješke
-    try:
-        note = mongo.db.notes.find_one({'_id': ObjectId(note_id)})
-    except:
+    query = service.note_query(note_id, current_user.id)
+    if query is None:
         flash('Bilješka nije pronađena.', 'danger')
         return redirect(url_for('notes.list_notes'))
 
-    if not note or note.get('user_id') != ObjectId(current_user.id):
+    note = mongo.db.notes.find_one(query)
+    if not note:
         flash('Nije pronađena bilješka ili nemate dozvolu za uređivanje.', 'danger')
         return redirect(url_for('notes.list_notes'))
 
@@ -72,14 +134,10 @@ def edit_note(note_id):
             note['content'] = content 
             return render_template('notes/edit.html', note=note, admin_mode=False)
 
-        mongo.db.notes.update_one(
-            {'_id': ObjectId(note_id)},
-            {'$set': {
-                'title': sanitized_title, # Koristimo sanitizirani
-                'content': sanitized_content, # Koristimo sanitizirani
-                'updated_at': datetime.utcnow()
-            }}
-        )
+        # Koristimo sanitizirane vrijednosti; vlasništvo je i u uvjetu upisa
+        if service.update_note(query, sanitized_title, sanitized_content, _editor()) is None:
+            flash('Nije pronađena bilješka ili nemate dozvolu za uređivanje.', 'danger')
+            return redirect(url_for('notes.list_notes'))
         flash('Bilješka uspješno ažurirana.', 'success')
         return redirect(url_for('notes.list_notes'))
 
@@ -89,16 +147,12 @@ def edit_note(note_id):
 @login_required
 def delete_note(note_id):
     # Funkcionalnost za korisnika: brisanje samo vlastite bilješke
-    try:
-        result = mongo.db.notes.delete_one({
-            '_id': ObjectId(note_id),
-            'user_id': ObjectId(current_user.id)
-        })
-    except:
+    query = service.note_query(note_id, current_user.id)
+    if query is None:
         flash('Bilješka nije pronađena.', 'danger')
         return redirect(url_for('notes.list_notes'))
 
-    if result.deleted_count == 1:
+    if service.delete_note(query, _editor()):
         flash('Bilješka uspješno obrisana.', 'success')
     else:
         flash('Nije pronađena bilješka ili nemate dozvolu za brisanje.', 'danger')
@@ -107,37 +161,252 @@ def delete_note(note_id):
 
 
 
+# --- Povijest izmjena (zajedničko za korisnika i admina) ---
+
+REVISION_NOTE_PROJECTION = {'user_id': 1, 'title': 1, 'content': 1, 'revision': 1}
+
+
+def _revision_note(query, admin_mode):
+    note = mongo.db.notes.find_one(query, REVISION_NOTE_PROJECTION) if query else None
+    if note and admin_mode:
+        user = User.get_by_id(note.get('user_id'))
+        note['username'] = user.username if user else 'Nepoznat'
+    return note
+
+
+def _revisions_back(admin_mode):
+    return redirect(url_for('notes.admin_dashboard' if admin_mode else 'notes.list_notes'))
+
+
+def _revisions_page(query, admin_mode):
+    note = _revision_note(query, admin_mode)
+    if not note:
+        flash('Bilješka nije pronađena.', 'danger')
+        return _revisions_back(admin_mode)
+    return render_template(
+        'notes/revisions.html', note=note, revisions=revisions.list_revisions(note['_id']), admin_mode=admin_mode
+    )
+
+
+def _find_revision(note, rev):
+    try:
+        return revisions.get_revision(note, rev) if note else None
+    except revisions.RevisionChainError:
+        current_app.logger.exception('Verzija %s bilješke se ne može rekonstruirati', rev)
+        return None
+
+
+def _revision_page(query, rev, admin_mode):
+    note = _revision_note(query, admin_mode)
+    revision = _find_revision(note, rev)
+    if not revision:
+        flash('Verzija bilješke nije pronađena.', 'danger')
+        return _revisions_back(admin_mode)
+    diff = difflib.unified_diff(
+        revision['content'].splitlines(), (note.get('content') or '').splitlines(),
+        f'verzija {rev}', 'trenutna', lineterm=''
+    )
+    return render_template(
+        'notes/revision.html', note=note, revision=revision, content_html=render_note_html(revision['content']),
+        diff='\n'.join(diff), admin_mode=admin_mode
+    )
+
+
+def _restore_revision(query, rev, admin_mode):
+    note = _revision_note(query, admin_mode)
+    revision = _find_revision(note, rev)
+    if not revision:
+        flash('Verzija bilješke nije pronađena.', 'danger')
+        return _revisions_back(admin_mode)
+    # vraćanje je nova izmjena: trenutna verzija ostaje u povijesti
+    if service.update_note(query, revision['title'], revision['content'], _editor()) is None:
+        flash('Bilješka nije pronađena.', 'danger')
+        return _revisions_back(admin_mode)
+    flash(f'Vraćena je verzija {rev} bilješke "{revision["title"]}".', 'success')
+    endpoint = 'notes.admin_note_revisions' if admin_mode else 'notes.note_revisions'
+    return redirect(url_for(endpoint, note_id=note['_id']))
+
+
+@notes_bp.route('/edit/<note_id>/revisions')
+@login_required
+def note_revisions(note_id):
+    return _revisions_page(service.note_query(note_id, current_user.id), admin_mode=False)
+
+@notes_bp.route('/edit/<note_id>/revisions/<int:rev>')
+@login_required
+def view_revision(note_id, rev):
+    return _revision_page(service.note_query(note_id, current_user.id), rev, admin_mode=False)
+
+@notes_bp.route('/edit/<note_id>/revisions/<int:rev>/restore', methods=['POST'])
+@login_required
+def restore_revision(note_id, rev):
+    return _restore_revision(service.note_query(note_id, current_user.id), rev, admin_mode=False)
+
+@notes_bp.route('/export')
+@login_required
+def export_notes():
+    # Izvoz vlastitih bilješki kao NDJSON, streamano iz kursora
+    cursor = transfer.export_cursor(
+        {'user_id': ObjectId(current_user.id)}, current_app.config['EXPORT_BATCH_SIZE']
+    )
+    return _ndjson_download(transfer.export_lines(cursor), f'biljeske-{current_user.username}')
+
+@notes_bp.route('/import', methods=['POST'])
+@login_required
+def import_notes():
+    # Uvoz bilješki u vlastiti račun (NDJSON datoteka iz forme ili tijelo zahtjeva)
+    report = _run_import(transfer.OwnerResolver(ObjectId(current_user.id), current_user.username))
+    return _import_response(report, 'notes.list_notes')
+
+
+def _ndjson_download(lines, name):
+    response = current_app.response_class(stream_with_context(lines), mimetype='application/x-ndjson')
+    filename = f'{name}-{datetime.utcnow():%Y-%m-%d}.ndjson'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def _run_import(resolve_owner):
+    request.max_content_length = current_app.config['IMPORT_MAX_BYTES']
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        lines = upload.stream if upload else []
+    else:
+        # tijelo zahtjeva čita se redak po redak, bez učitavanja cijele datoteke
+        lines = io.BufferedReader(request.stream)
+    return transfer.import_notes(
+        lines,
+        resolve_owner,
+        chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+        max_errors=current_app.config['IMPORT_MAX_ERRORS'],
+        render=current_app.config['IMPORT_RENDER']
+    )
+
+def _import_response(report, endpoint):
+    # forma -> flash poruka; API poziv (NDJSON tijelo) -> JSON izvještaj
+    if request.mimetype != 'multipart/form-data':
+        return jsonify(report.to_dict())
+    flash(f'Uvezeno bilješki: {report.inserted}.', 'success' if report.inserted else 'warning')
+    if report.failed:
+        details = '; '.join(f'redak {e["line"]}: {e["error"]}' for e in report.errors[:5])
+        flash(f'Neuspjelo: {report.failed} ({details}).', 'danger')
+    return redirect(url_for(endpoint))
+
+
 #RUTE ZA ADMIN DASHBOARD
 
 @notes_bp.route('/admin/dashboard')
 @login_required
 @role_required('admin')
+@conditional_get(_all_notes_version)
 def admin_dashboard():
-    #(kod za dohvaćanje bilješki)
-    #(kod za spajanje bilješki s korisničkim imenom)
-    all_notes_docs = list(mongo.db.notes.find().sort('created_at', -1))
-    user_ids = [n.get('user_id') for n in all_notes_docs if n.get('user_id')]
-    unique_user_ids = list(set(user_ids))
-    users_data = list(mongo.db.users.find({'_id': {'$in': unique_user_ids}}, {'username': 1}))
-    user_map = {u['_id']: u['username'] for u in users_data}
-    notes_with_users = []
-    for note in all_notes_docs:
-        note['username'] = user_map.get(note.get('user_id'), 'Nepoznat')
-        notes_with_users.append(note)
+    # Jedan aggregation upit: stranica bilješki + korisničko ime ($lookup)
+    # + samo polja potrebna za tablicu, s tekstualnim pregledom umjesto Markdowna
+    query, filters = _admin_filters(request.args)
+    stream = streaming_enabled()
+    page = paginate_pipeline(
+        mongo.db.notes,
+        query,
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config['ADMIN_NOTES_PER_PAGE'],
+        stages=ADMIN_TABLE_STAGES,
+        lazy=stream,
+        batch_size=current_app.config['STREAM_BATCH_SIZE']
+    )
+    return render_page('admin/admin_dashboard.html', stream=stream, notes=page, filters=filters)
+
+
+# Join s korisnicima i projekcija za admin tablicu (primjenjuje se samo na jednu stranicu)
+ADMIN_TABLE_STAGES = [
+    {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user'}},
+    {'$project': {
+        'user_id': 1,
+        'title': 1,
+        'created_at': 1,
+        'username': {'$ifNull': [{'$arrayElemAt': ['$user.username', 0]}, 'Nepoznat']},
+        # bilješke koje render-backfill još nije obradio nemaju 'preview'
+        'preview': {'$ifNull': ['$preview', {'$substrCP': [{'$ifNull': ['$content', '']}, 0, PREVIEW_LENGTH]}]},
+    }},
+]
+
+def _admin_filters(args):
+    """
+    Filteri admin tablice (korisničko ime, raspon datuma YYYY-MM-DD).
+    Vraća (Mongo upit, aktivni filteri za linkove paginacije).
+    """
+    query = {}
+    filters = {}
+
+    username = args.get('user', '').strip()
+    if username:
+        filters['user'] = username
+        user = User.get_by_username(username)
+        # nepostojeći korisnik -> prazan rezultat
+        query['user_id'] = user._data['_id'] if user else {'$in': []}
+
+    created = {}
+    for name, op, shift in (('date_from', '$gte', 0), ('date_to', '$lt', 1)):
+        value = args.get(name, '').strip()
+        if not value:
+            continue
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            flash(f'Neispravan datum: {value}', 'warning')
+            continue
+        filters[name] = value
+        created[op] = day + timedelta(days=shift)
+    if created:
+        query['created_at'] = created
+
+    return query, filters
+
+
+@notes_bp.route('/admin/export')
+@login_required
+@role_required('admin')
+def admin_export_notes():
+    # Izvoz svih bilješki s vlasnikom (user_id, username)
+    cursor = transfer.export_cursor({}, current_app.config['EXPORT_BATCH_SIZE'], with_owner=True)
+    return _ndjson_download(transfer.export_lines(cursor, with_owner=True), 'biljeske-sve')
 
-    return render_template('admin/admin_dashboard.html', notes=notes_with_users) 
+
+@notes_bp.route('/admin/import', methods=['POST'])
+@login_required
+@role_required('admin')
+def admin_import_notes():
+    # Vlasnik po "username"/"user_id" iz retka; bez njih bilješka ide adminu
+    report = _run_import(
+        transfer.OwnerResolver(ObjectId(current_user.id), current_user.username, allow_other=True)
+    )
+    return _import_response(report, 'notes.admin_dashboard')
+
+
+@notes_bp.route('/admin/stats')
+@login_required
+@role_required('admin')
+def admin_stats():
+    # Brojači se održavaju pri upisu (app/stats.py), ovdje se samo čitaju
+    totals, users, per_day = read_dashboard(
+        top_users=current_app.config['STATS_TOP_USERS'],
+        days=current_app.config['STATS_DAYS']
+    )
+    return render_template('admin/stats.html', totals=totals, users=users, per_day=per_day)
+
+
+@notes_bp.route('/admin/cache-stats')
+@login_required
+@role_required('admin')
+def admin_cache_stats():
+    # Brojači cacheova (renderirani Markdown, korisnici) za ovaj worker
+    return jsonify({'markdown': render_cache.stats(), 'users': user_cache.stats()})
 
 
 @notes_bp.route('/admin/edit/<note_id>', methods=['GET', 'POST'])
 @login_required
 @role_required('admin') 
 def admin_edit_note(note_id):
-    try:
-        note = mongo.db.notes.find_one({'_id': ObjectId(note_id)})
-    except:
-        flash('Bilješka nije pronađena.', 'danger')
-        return redirect(url_for('notes.admin_dashboard'))
-
+    query = service.note_query(note_id)
+    note = mongo.db.notes.find_one(query) if query else None
     if not note:
         flash('Bilješka nije pronađena.', 'danger')
         return redirect(url_for('notes.admin_dashboard'))
@@ -162,14 +431,9 @@ def admin_edit_note(note_id):
             note['content'] = content 
             return render_template('notes/edit.html', note=note, admin_mode=True)
 
-        mongo.db.notes.update_one(
-            {'_id': ObjectId(note_id)},
-            {'$set': {
-                'title': sanitized_title, # Koristimo sanitizirani
-                'content': sanitized_content, # Koristimo sanitizirani
-                'updated_at': datetime.utcnow()
-            }}
-        )
+        if service.update_note(query, sanitized_title, sanitized_content, _editor()) is None:
+            flash('Bilješka nije pronađena.', 'danger')
+            return redirect(url_for('notes.admin_dashboard'))
         flash(f'Bilješka "{title}" (od korisnika: {note["username"]}) uspješno ažurirana (Admin).', 'success')
         return redirect(url_for('notes.admin_dashboard'))
 
@@ -180,15 +444,35 @@ def admin_edit_note(note_id):
 @login_required
 @role_required('admin')
 def admin_delete_note(note_id):
-    try:
-        result = mongo.db.notes.delete_one({'_id': ObjectId(note_id)})
-    except Exception as e:
-        flash(f'Greška prilikom brisanja bilješke: {e}', 'danger')
+    query = service.note_query(note_id)
+    if query is None:
+        flash('Bilješka nije pronađena.', 'danger')
         return redirect(url_for('notes.admin_dashboard'))
 
-    if result.deleted_count == 1:
+    if service.delete_note(query, _editor()):
         flash(f'Bilješka ID: {note_id} uspješno obrisana (Admin).', 'success')
     else:
         flash('Bilješka nije pronađena.', 'danger')
 
-    return redirect(url_for('notes.admin_dashboard'))
\ No newline at end of file
+    return redirect(url_for('notes.admin_dashboard'))
+
+
+@notes_bp.route('/admin/edit/<note_id>/revisions')
+@login_required
+@role_required('admin')
+def admin_note_revisions(note_id):
+    return _revisions_page(service.note_query(note_id), admin_mode=True)
+
+
+@notes_bp.route('/admin/edit/<note_id>/revisions/<int:rev>')
+@login_required
+@role_required('admin')
+def admin_view_revision(note_id, rev):
+    return _revision_page(service.note_query(note_id), rev, admin_mode=True)
+
+
+@notes_bp.route('/admin/edit/<note_id>/revisions/<int:rev>/restore', methods=['POST'])
+@login_required
+@role_required('admin')
+def admin_restore_revision(note_id, rev):
+    return _restore_revision(service.note_query(note_id), rev, admin_mode=True)
@@ -0,0 +1,192 @@
+from datetime import datetime
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from ..extensions import mongo
+from ..utils import sanitize_html
+from ..rendering import rendered_fields
+from ..search import search_fields
+from . import revisions
+from ..stats import (
+    note_size, record_note_created, record_note_updated, record_note_deleted, record_notes_deleted
+)
+
+# Upisi bilješki zajednički za HTML rute i JSON API (app.api): provjera
+# vlasništva, sanitizacija, izvedena polja (HTML, tokeni), statistika i
+# povijest izmjena (revisions).
+
+# Polja stare/obrisane bilješke potrebna za ažuriranje statistike
+STATS_PROJECTION = {'user_id': 1, 'title': 1, 'content': 1, 'created_at': 1}
+# ... i za reviziju zamijenjene verzije
+UPDATE_PROJECTION = {**STATS_PROJECTION, 'revision': 1}
+
+
+def parse_id(note_id):
+    try:
+        return ObjectId(note_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+def note_query(note_id, user_id=None):
+    """
+    Upit za bilješku note_id. Uz user_id bilješka mora pripadati tom
+    korisniku (uređivanje i brisanje vlastitih bilješki); admin rute ga
+    ne zadaju. Neispravan ID vraća None.
+    """
+    oid = parse_id(note_id)
+    if oid is None:
+        return None
+    query = {'_id': oid}
+    if user_id is not None:
+        query['user_id'] = ObjectId(user_id)
+    return query
+
+
+def clean(value):
+    return sanitize_html((value or '').strip())
+
+
+def derived_fields(title, content):
+    # Polja izvedena iz naslova i sadržaja: renderirani HTML i tokeni za pretraživanje
+    return {**rendered_fields(content), **search_fields(title, content)}
+
+
+def insert_note(user_id, username, title, content):
+    """
+    Sprema novu bilješku (naslov i sadržaj već sanitizirani) i vraća dokument.
+    """
+    note = {
+        'user_id': ObjectId(user_id),
+        'title': title,
+        'content': content,
+        'created_at': datetime.utcnow(),
+        **derived_fields(title, content)
+    }
+    mongo.db.notes.insert_one(note)
+    record_note_created(note['user_id'], username, note_size(title, content), note['created_at'])
+    return note
+
+
+def update_note(query, title, content, editor=None):
+    """
+    Ažurira bilješku koja odgovara upitu (vlasništvo je dio upita) i
+    sprema zamijenjenu verziju u povijest; editor je (user_id, username).
+    Vraća dokument prije izmjene ili None ako bilješka ne postoji.
+    """
+    now = datetime.utcnow()
+    # stari sadržaj i broj verzije vraća isti upit koji upisuje novi
+    before = mongo.db.notes.find_one_and_update(
+        query,
+        {
+            '$set': {
+                'title': title,
+                'content': content,
+                'updated_at': now,
+                **derived_fields(title, content)
+            },
+            '$inc': {'revision': 1},
+        },
+        projection=UPDATE_PROJECTION,
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return None
+    revisions.save_revisions([
+        revisions.revision_doc(before['_id'], before.get('revision', 0), before, title, content, editor, now)
+    ])
+    record_note_updated(
+        before['user_id'], note_size(title, content) - note_size(before.get('title'), before.get('content'))
+    )
+    return before
+
+
+def delete_note(query, editor=None):
+    """
+    Briše bilješku koja odgovara upitu; vraća obrisani dokument ili None.
+    Povijest izmjena ostaje (vidi revisions.archive_deleted).
+    """
+    deleted = mongo.db.notes.find_one_and_delete(query, projection=UPDATE_PROJECTION)
+    if deleted:
+        revisions.archive_deleted([deleted], editor)
+        record_note_deleted(
+            deleted['user_id'], note_size(deleted.get('title'), deleted.get('content')), deleted.get('created_at')
+        )
+    return deleted
+
+
+def delete_notes(note_ids, user_id, editor=None):
+    """
+    Briše više vlastitih bilješki; vraća skup obrisanih ID-eva.
+    """
+    query = {'_id': {'$in': list(note_ids)}, 'user_id': ObjectId(user_id)}
+    found = list(mongo.db.notes.find(query, UPDATE_PROJECTION))
+    if not found:
+        return set()
+    ids = [doc['_id'] for doc in found]
+    mongo.db.notes.delete_many({'_id': {'$in': ids}, 'user_id': ObjectId(user_id)})
+    revisions.archive_deleted(found, editor)
+    record_notes_deleted([
+        (doc['user_id'], note_size(doc.get('title'), doc.get('content')), doc.get('created_at'))
+        for doc in found
+    ])
+    return set(ids)
+
+
+def update_notes(changes, user_id, editor=None):
+    """
+    Ažurira više vlastitih bilješki jednim bulk_write, a zamijenjene verzije
+    sprema jednim insert_many.
+    changes: {ObjectId: (naslov, sadržaj)} s već sanitiziranim vrijednostima;
+    None zadržava postojeću vrijednost polja. Svaki upis vrijedi samo ako je
+    bilješka još na pročitanoj verziji (inače bi dvije istovremene izmjene
+    spremile istu reviziju). Vraća (ažurirani ID-evi, ID-evi u konfliktu).
+    """
+    owner = ObjectId(user_id)
+    before = {
+        doc['_id']: doc
+        for doc in mongo.db.notes.find({'_id': {'$in': list(changes)}, 'user_id': owner}, UPDATE_PROJECTION)
+    }
+    if not before:
+        return set(), set()
+    now = datetime.utcnow()
+    ops = []
+    written = {}
+    for oid, doc in before.items():
+        title, content = changes[oid]
+        title = doc.get('title', '') if title is None else title
+        content = doc.get('content', '') if content is None else content
+        # bez polja 'revision' upit {'revision': None} odgovara i bilješci bez njega
+        ops.append(UpdateOne({'_id': oid, 'user_id': owner, 'revision': doc.get('revision')}, {
+            '$set': {
+                'title': title,
+                'content': content,
+                'updated_at': now,
+                **derived_fields(title, content)
+            },
+            '$inc': {'revision': 1},
+        }))
+        written[oid] = (title, content)
+    result = mongo.db.notes.bulk_write(ops, ordered=False)
+
+    updated = set(before)
+    if result.matched_count < len(ops):
+        # bulk_write ne kaže koji upisi nisu prošli: upis je prošao ako
+        # bilješka sada ima našu verziju i sadržaj
+        updated = {
+            doc['_id']
+            for doc in mongo.db.notes.find({'_id': {'$in': list(before)}}, {'title': 1, 'content': 1, 'revision': 1})
+            if doc.get('revision') == before[doc['_id']].get('revision', 0) + 1
+            and (doc.get('title'), doc.get('content')) == written[doc['_id']]
+        }
+    history = []
+    size_delta = 0
+    for oid in updated:
+        doc = before[oid]
+        title, content = written[oid]
+        history.append(revisions.revision_doc(oid, doc.get('revision', 0), doc, title, content, editor, now))
+        size_delta += note_size(title, content) - note_size(doc.get('title'), doc.get('content'))
+    revisions.save_revisions(history)
+    if updated:
+        record_note_updated(owner, size_delta)
+    return updated, set(before) - updated
@@ -0,0 +1,211 @@
+import json
+from datetime import datetime
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
+from ..extensions import mongo
+from ..utils import sanitize_many
+from ..rendering import rendered_fields
+from ..search import search_fields
+from ..stats import note_size, record_notes_imported
+
+# Izvoz i uvoz bilješki u NDJSON formatu (jedan JSON objekt po retku):
+#   {"title": ..., "content": ..., "created_at": "2025-01-31T12:00:00", "updated_at": ...}
+# Admin izvoz dodaje "user_id" i "username"; admin uvoz po njima bira vlasnika.
+
+EXPORT_FIELDS = {'user_id': 1, 'title': 1, 'content': 1, 'created_at': 1, 'updated_at': 1}
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else None
+
+
+def export_lines(cursor, with_owner=False):
+    """
+    Generator NDJSON redaka iz kursora; u memoriji je samo jedna serija kursora.
+    """
+    for note in cursor:
+        record = {
+            'title': note.get('title', ''),
+            'content': note.get('content', ''),
+            'created_at': _isoformat(note.get('created_at')),
+            'updated_at': _isoformat(note.get('updated_at')),
+        }
+        if with_owner:
+            record['user_id'] = str(note.get('user_id'))
+            record['username'] = note.get('username')
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def export_cursor(query, batch_size, with_owner=False):
+    if not with_owner:
+        return mongo.db.notes.find(query, EXPORT_FIELDS).sort('_id', 1).batch_size(batch_size)
+    # korisničko ime preko $lookup, serija po serija
+    return mongo.db.notes.aggregate([
+        {'$match': query},
+        {'$sort': {'_id': 1}},
+        {'$project': EXPORT_FIELDS},
+        {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user'}},
+        {'$addFields': {'username': {'$arrayElemAt': ['$user.username', 0]}}},
+        {'$project': {'user': 0}},
+    ], batchSize=batch_size)
+
+
+class RecordError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self, max_errors):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self._max_errors = max_errors
+
+    def error(self, line_no, message):
+        self.failed += 1
+        # broje se sve greške, a za izvještaj se pamti samo prvih max_errors
+        if len(self.errors) < self._max_errors:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def to_dict(self):
+        # greške iz upisa serije dolaze nakon grešaka parsiranja kasnijih redaka
+        errors = sorted(self.errors, key=lambda e: e['line'])
+        return {'inserted': self.inserted, 'failed': self.failed, 'errors': errors}
+
+
+def _parse_datetime(value, field):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RecordError(f'Neispravan datum u polju "{field}".')
+
+
+def _parse_record(raw):
+    try:
+        record = json.loads(raw)
+    except (UnicodeDecodeError, ValueError):
+        raise RecordError('Redak nije ispravan JSON.')
+    if not isinstance(record, dict):
+        raise RecordError('Redak mora biti JSON objekt.')
+    title = record.get('title')
+    content = record.get('content', '')
+    if not isinstance(title, str) or not isinstance(content, str):
+        raise RecordError('Polja "title" i "content" moraju biti tekst.')
+    created_at = _parse_datetime(record.get('created_at'), 'created_at')
+    updated_at = _parse_datetime(record.get('updated_at'), 'updated_at')
+    return record, title.strip(), content.strip(), created_at, updated_at
+
+
+class OwnerResolver:
+    """
+    Vlasnik uvezene bilješke. Običan korisnik uvozi uvijek u svoj račun;
+    admin (allow_other=True) po "username" / "user_id" iz retka, inače u svoj.
+    """
+
+    def __init__(self, user_id, username, allow_other=False):
+        self._default = (user_id, username)
+        self._allow_other = allow_other
+        self._by_username = {}
+        self._by_id = {}
+
+    def __call__(self, record):
+        if not self._allow_other:
+            return self._default
+        username = record.get('username')
+        if username:
+            if username not in self._by_username:
+                doc = mongo.db.users.find_one({'username': username}, {'username': 1})
+                self._by_username[username] = (doc['_id'], doc['username']) if doc else None
+            owner = self._by_username[username]
+            if owner is None:
+                raise RecordError(f'Korisnik "{username}" ne postoji.')
+            return owner
+        user_id = record.get('user_id')
+        if user_id:
+            if user_id not in self._by_id:
+                try:
+                    doc = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'username': 1})
+                except (InvalidId, TypeError):
+                    doc = None
+                self._by_id[user_id] = (doc['_id'], doc['username']) if doc else None
+            owner = self._by_id[user_id]
+            if owner is None:
+                raise RecordError(f'Korisnik s ID-om {user_id} ne postoji.')
+            return owner
+        return self._default
+
+
+def import_notes(lines, resolve_owner, chunk_size=500, max_errors=100, render=False):
+    """
+    Uvozi bilješke iz NDJSON redaka (bytes ili str). Retci se obrađuju u
+    serijama od chunk_size: sanitizacija i jedan neuređeni insert_many po
+    seriji. Vraća ImportReport s greškama po retku.
+
+    Renderiranje Markdowna (~2-3 ms po bilješci, većinom bleach) je najsporiji
+    dio uvoza, pa se bez render=True preskače: takve bilješke se renderiraju
+    pri prikazu (note_html) dok ih `flask notes render-backfill` ne obradi.
+    """
+    report = ImportReport(max_errors)
+    batch = []
+    for line_no, raw in enumerate(lines, 1):
+        if not raw.strip():
+            continue
+        try:
+            record, title, content, created_at, updated_at = _parse_record(raw)
+            owner = resolve_owner(record)
+        except RecordError as e:
+            report.error(line_no, str(e))
+            continue
+        batch.append((line_no, owner, title, content, created_at, updated_at))
+        if len(batch) >= chunk_size:
+            _write_batch(batch, report, render)
+            batch = []
+    if batch:
+        _write_batch(batch, report, render)
+    return report
+
+
+def _write_batch(batch, report, render):
+    titles = sanitize_many([item[2] for item in batch])
+    contents = sanitize_many([item[3] for item in batch])
+    now = datetime.utcnow()
+
+    docs = []
+    sources = []
+    for (line_no, owner, _, _, created_at, updated_at), title, content in zip(batch, titles, contents):
+        if not title:
+            report.error(line_no, 'Naslov je obavezan.')
+            continue
+        doc = {
+            'user_id': owner[0],
+            'title': title,
+            'content': content,
+            'created_at': created_at or now,
+            **search_fields(title, content),
+        }
+        if render:
+            doc.update(rendered_fields(content))
+        if updated_at:
+            doc['updated_at'] = updated_at
+        docs.append(doc)
+        sources.append((line_no, owner))
+    if not docs:
+        return
+
+    failed = set()
+    try:
+        mongo.db.notes.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get('writeErrors', []):
+            failed.add(write_error['index'])
+            report.error(sources[write_error['index']][0], write_error.get('errmsg', 'Greška pri upisu.'))
+
+    inserted = [
+        (owner[0], owner[1], note_size(doc['title'], doc['content']), doc['created_at'])
+        for i, (doc, (_, owner)) in enumerate(zip(docs, sources)) if i not in failed
+    ]
+    report.inserted += len(inserted)
+    record_notes_imported(inserted)
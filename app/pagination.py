@@ -0,0 +1,204 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+
+# Keyset (cursor) paginacija po (created_at, _id), uvijek silazno.
+# Za razliku od skip/limit, svaka stranica je jedan upit s limitom
+# i ne ovisi o tome koliko je bilješki ukupno u kolekciji.
+
+SORT = [('created_at', -1), ('_id', -1)]
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+class LazyPage(Page):
+    """
+    Stranica koja dokumente čita iz Mongo kursora tek pri iteraciji
+    (streaming predložaka), pa u memoriji nije cijela stranica odjednom.
+    Može se iterirati samo jednom; next_cursor je poznat tek nakon
+    iteracije, pa pager mora biti ispod popisa.
+    """
+
+    def __init__(self, open_cursor, position, per_page):
+        super().__init__([])
+        # upit se šalje tek pri prvom čitanju (npr. nakon što je <head> poslan)
+        self._open_cursor = open_cursor
+        self._cursor = None
+        self._position = position
+        self._per_page = per_page
+        self._first = _NOT_READ
+
+    def _peek(self):
+        if self._first is _NOT_READ:
+            self._cursor = self._open_cursor()
+            self._first = next(self._cursor, None)
+        return self._first
+
+    def __bool__(self):
+        return self._peek() is not None
+
+    def __len__(self):
+        raise TypeError('LazyPage nema duljinu prije iteracije')
+
+    def __iter__(self):
+        doc = self._peek()
+        # finally: i kad se generator zatvori ranije (klijent prekine stream),
+        # kursor na serveru se zatvara odmah, a ne tek po isteku
+        try:
+            if doc is None:
+                return
+            if self._position is not None:
+                self.prev_cursor = encode_cursor(doc, 'p')
+            count = 1
+            yield doc
+            for following in self._cursor:
+                if count == self._per_page:
+                    # dokument viška: postoji iduća stranica
+                    self.next_cursor = encode_cursor(doc, 'n')
+                    break
+                doc = following
+                count += 1
+                yield doc
+        finally:
+            self._cursor.close()
+
+
+_NOT_READ = object()
+
+
+def encode_cursor(doc, direction):
+    """
+    Vraća neprozirni token za poziciju dokumenta.
+    direction: 'n' (sljedeća stranica) ili 'p' (prethodna stranica)
+    """
+    payload = {
+        't': doc['created_at'].isoformat(),
+        'i': str(doc['_id']),
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Dekodira token u (created_at, _id, direction).
+    Neispravan token vraća None (prikazuje se prva stranica).
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload['t'])
+        oid = ObjectId(payload['i'])
+        direction = payload['d']
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        return None
+    if direction not in ('n', 'p'):
+        return None
+    return created_at, oid, direction
+
+
+def keyset_filter(created_at, oid, direction):
+    """
+    Uvjet za dokumente nakon ('n') ili prije ('p') zadane pozicije.
+    """
+    op = '$lt' if direction == 'n' else '$gt'
+    return {'$or': [
+        {'created_at': {op: created_at}},
+        {'created_at': created_at, '_id': {op: oid}},
+    ]}
+
+
+def _page_spec(query, position):
+    if not position:
+        return dict(query)
+    condition = keyset_filter(*position)
+    return {'$and': [query, condition]} if query else condition
+
+
+def paginate(collection, query, cursor=None, per_page=20, projection=None, lazy=False, batch_size=100):
+    """
+    Dohvaća jednu stranicu dokumenata iz kolekcije.
+    Čita se per_page + 1 dokument da bi se znalo postoji li iduća stranica.
+    lazy=True vraća LazyPage (dokumenti se čitaju u serijama od batch_size).
+    """
+    position = decode_cursor(cursor)
+    direction = position[2] if position else 'n'
+
+    spec = _page_spec(query, position)
+    sort = SORT if direction == 'n' else [(field, -order) for field, order in SORT]
+    docs = collection.find(spec, projection).sort(sort).limit(per_page + 1)
+    # prethodna stranica ('p') čita se obrnutim redom i okreće, pa se uvijek učita cijela
+    if lazy and direction == 'n':
+        return LazyPage(lambda: docs.batch_size(batch_size), position, per_page)
+    return _build_page(list(docs), position, direction, per_page)
+
+
+def paginate_pipeline(collection, query, cursor=None, per_page=20, stages=(), lazy=False, batch_size=100):
+    """
+    Kao paginate(), ali kao aggregation pipeline: stranica se odredi
+    ($match, $sort, $limit) prije dodatnih stages (npr. $lookup, $project),
+    pa se join i projekcija rade samo za dokumente s te stranice.
+    """
+    position = decode_cursor(cursor)
+    direction = position[2] if position else 'n'
+
+    order = 1 if direction == 'n' else -1
+    pipeline = [
+        {'$match': _page_spec(query, position)},
+        {'$sort': {field: value * order for field, value in SORT}},
+        {'$limit': per_page + 1},
+        *stages,
+    ]
+    if lazy and direction == 'n':
+        return LazyPage(lambda: collection.aggregate(pipeline, batchSize=batch_size), position, per_page)
+    docs = list(collection.aggregate(pipeline))
+    return _build_page(docs, position, direction, per_page)
+
+
+def _build_page(docs, position, direction, per_page):
+    has_more = len(docs) > per_page
+    docs = docs[:per_page]
+    if direction == 'p':
+        docs.reverse()
+
+    if not docs:
+        return Page([])
+
+    if direction == 'n':
+        has_next, has_prev = has_more, position is not None
+    else:
+        has_next, has_prev = True, has_more
+
+    return Page(
+        docs,
+        next_cursor=encode_cursor(docs[-1], 'n') if has_next else None,
+        prev_cursor=encode_cursor(docs[0], 'p') if has_prev else None,
+    )
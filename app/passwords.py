@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, has_request_context
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from .monitoring import timed
+
+# Hashiranje lozinki (werkzeug) s metodom i parametrima iz Configa.
+# Provjera i hashiranje u zahtjevu izvršavaju se u malom poolu procesa
+# (po workeru): CPU-skupi scrypt ne drži GIL workera, pa ostale dretve
+# (gthread) i dalje poslužuju druge rute, a broj istovremenih hashiranja
+# i zahtjeva koji na njih čekaju je ograničen.
+
+
+class PasswordHasherBusy(Exception):
+    """Previše zahtjeva već čeka na hashiranje lozinke ili pool ne odgovara."""
+
+
+def canonical_method(method):
+    """
+    Metoda s eksplicitnim parametrima, kako je werkzeug zapisuje u hash
+    (npr. 'scrypt' -> 'scrypt:32768:8:1').
+    """
+    name, *params = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = canonical_method('scrypt')
+        self.salt_length = 16
+        self._workers = 0
+        self._timeout = None
+        self._slots = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.method = canonical_method(config['PASSWORD_HASH_METHOD'])
+        self.salt_length = config['PASSWORD_SALT_LENGTH']
+        self._workers = config['PASSWORD_POOL_WORKERS']
+        self._timeout = config['PASSWORD_POOL_TIMEOUT']
+        # poslovi u poolu + poslovi koji čekaju na slobodan proces
+        self._slots = threading.BoundedSemaphore(self._workers + config['PASSWORD_POOL_MAX_PENDING'])
+        # provjera postavki odmah pri startu (npr. nepoznata metoda)
+        generate_password_hash('', self.method, self.salt_length)
+
+    def _get_pool(self):
+        # pool se kreira u workeru (nakon forka), pri prvoj prijavi
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    # 'spawn': procesi bez kopije dretvi i Mongo klijenta workera
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self._workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        # izvan zahtjeva (CLI, startup seed) i bez poola: u trenutnoj dretvi
+        if not self._workers or not has_request_context():
+            return fn(*args)
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PasswordHasherBusy()
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # pool je pao ili ga je druga dretva upravo zamijenila
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool)
+            raise PasswordHasherBusy() from e
+        # slot se oslobađa tek kad posao stvarno završi (ili je otkazan), pa
+        # ni posao koji je istekao ovom zahtjevu ne prelazi ograničenje poola
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeoutError as e:
+            # sporo čekanje u redu nije kvar: pool ostaje, a posao koji još
+            # nije počeo se otkazuje
+            future.cancel()
+            current_app.logger.warning('Hashiranje lozinke nije završilo za %s s.', self._timeout)
+            raise PasswordHasherBusy() from e
+        except CancelledError as e:
+            # pool je zamijenjen dok je posao čekao u redu
+            raise PasswordHasherBusy() from e
+        except BrokenProcessPool as e:
+            # proces iz poola je pao (npr. OOM kill): novi pool pri sljedećem
+            # pozivu, ovaj zahtjev dobiva 'pokušajte ponovno'
+            current_app.logger.error('Pool za hashiranje lozinki je pao: %r', e)
+            self._discard_pool(pool)
+            raise PasswordHasherBusy() from e
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def hash(self, password):
+        with timed('pwd'):
+            return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        with timed('pwd'):
+            return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        True ako je hash napravljen drugom metodom, parametrima ili duljinom soli.
+        """
+        method, _, rest = (password_hash or '').partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
+
+
+password_hasher = PasswordHasher()
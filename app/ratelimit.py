@@ -0,0 +1,47 @@
+from flask import current_app
+from limits.storage import MongoDBStorage
+from .extensions import mongo
+
+# Storage za Flask-Limiter (RATELIMIT_STORAGE_URI='app-mongodb://'): brojači
+# u bazi aplikacije, zajednički svim gunicorn workerima i instancama.
+# Modul mora biti uvezen prije limiter.init_app() da bi shema bila registrirana.
+
+COUNTERS_COLLECTION = 'ratelimit_counters'
+WINDOWS_COLLECTION = 'ratelimit_windows'
+
+
+class AppMongoStorage(MongoDBStorage):
+    """
+    MongoDB storage iz paketa limits, ali nad MongoClientom aplikacije
+    (mongo.cx) umjesto zasebnog klijenta: bez dodatnog poola veza i
+    monitor dretvi po workeru, a klijent se nakon forka obnavlja zajedno
+    s aplikacijskim (vidi extensions.PyMongo).
+
+    Moving window je jedan update_one s upsertom po limitu ($push sa
+    $slice), bez čitanja prije upisa. TTL indeksi nad expireAt su u
+    app/indexes.py.
+    """
+    STORAGE_SCHEME = ['app-mongodb']
+
+    def __init__(self, uri, **options):
+        super().__init__(
+            uri,
+            counter_collection_name=COUNTERS_COLLECTION,
+            window_collection_name=WINDOWS_COLLECTION,
+            **options
+        )
+
+    @property
+    def storage(self):
+        return mongo.cx
+
+    @property
+    def _database(self):
+        return mongo.db
+
+
+def config_limit(key):
+    """
+    Limit rute iz Configa (npr. RATELIMIT_LOGIN), čita se pri svakom zahtjevu.
+    """
+    return lambda: current_app.config[key]
@@ -0,0 +1,185 @@
+import hashlib
+import html as html_lib
+import re
+import threading
+from .cache import LRUCache
+from .utils import sanitize_html
+from .monitoring import timed
+
+# Verzija renderera. Povećati kad se promijene ekstenzije ili sanitizacija,
+# tada `flask notes render-backfill` ponovno renderira spremljene bilješke.
+RENDER_VERSION = 2
+
+MARKDOWN_EXTENSIONS = ['fenced_code']
+
+# Duljina tekstualnog pregleda (admin tablica)
+PREVIEW_LENGTH = 160
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+# Pregled u editoru (render_preview_blocks): granice blokova
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_REFERENCE_RE = re.compile(r'^ {0,3}\[[^\]]+\]:', re.MULTILINE)
+# retci koji mogu nastaviti prethodni blok i nakon praznog retka
+# (uvučeni kod/nastavak liste, stavka liste, citat)
+_CONTINUATION_RE = re.compile(r'^(\s|[-*+]\s|\d+[.)]\s|>)')
+
+# Dio ključa cachea: isti tekst uz drugi skup ekstenzija daje drugi HTML
+_EXTENSIONS_KEY = ','.join(sorted(MARKDOWN_EXTENSIONS))
+
+# Cache renderiranog Markdowna (po procesu), ključ je hash teksta + ekstenzije.
+# Granice se postavljaju iz Configa u create_app().
+render_cache = LRUCache(max_entries=2048, max_bytes=16 * 1024 * 1024)
+
+# markdown.Markdown nije thread-safe pa svaka dretva ima svoju instancu,
+# koja se između poziva samo resetira umjesto da se gradi ispočetka.
+_local = threading.local()
+
+
+def _get_markdown():
+    md = getattr(_local, 'md', None)
+    if md is None:
+        # lazy import: markdown se učitava tek pri prvom renderiranju, ne pri startu workera
+        import markdown
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.md = md
+    return md
+
+
+def configure_render_cache(config):
+    render_cache.configure(
+        max_entries=config['MARKDOWN_CACHE_MAX_ENTRIES'],
+        max_bytes=config['MARKDOWN_CACHE_MAX_BYTES']
+    )
+
+
+def content_hash(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    """
+    Pretvara Markdown u HTML (bez sanitizacije), uz LRU cache.
+    """
+    if not text:
+        return ""
+    text = str(text)
+    # mjeri se i pogodak u cacheu (filter markdown_to_html, note_html za stare bilješke)
+    with timed('md'):
+        key = hashlib.sha256((_EXTENSIONS_KEY + '\0' + text).encode('utf-8')).hexdigest()
+        html = render_cache.get(key)
+        if html is None:
+            md = _get_markdown()
+            try:
+                html = md.convert(text)
+            finally:
+                md.reset()
+            render_cache.set(key, html, size=len(html.encode('utf-8')))
+    return html
+
+
+def render_note_html(content):
+    """
+    Renderira i sanitizira sadržaj bilješke.
+    """
+    return sanitize_html(render_markdown(content))
+
+
+def plain_text_preview(html, length=PREVIEW_LENGTH):
+    """
+    Kratki tekstualni pregled iz (sanitiziranog) HTML-a: bez tagova, jedan red.
+    """
+    text = html_lib.unescape(_TAG_RE.sub(' ', html or ''))
+    text = _SPACE_RE.sub(' ', text).strip()
+    if len(text) > length:
+        text = text[:length - 1].rstrip() + '…'
+    return text
+
+
+def rendered_fields(content):
+    """
+    Polja koja se spremaju uz 'content' pri svakom upisu bilješke.
+    """
+    content_html = render_note_html(content)
+    return {
+        'content_html': content_html,
+        'content_hash': content_hash(content),
+        'render_version': RENDER_VERSION,
+        'preview': plain_text_preview(content_html),
+    }
+
+
+def is_rendered(note):
+    """
+    True ako bilješka ima spremljen HTML trenutne verzije renderera.
+    """
+    return note.get('render_version') == RENDER_VERSION and 'content_html' in note
+
+
+def note_html(note):
+    """
+    Vraća spremljeni HTML bilješke; starije bilješke se renderiraju u letu
+    dok ih backfill ne obradi.
+    """
+    if is_rendered(note):
+        return note['content_html']
+    return render_note_html(note.get('content'))
+
+
+def split_blocks(text):
+    """
+    Dijeli Markdown na blokove koji se renderiraju neovisno: granica je
+    prazan redak ispred retka koji ne nastavlja prethodni blok, izvan
+    fenced koda. Tekst s reference linkovima ([id]: url) je jedan blok jer
+    definicija vrijedi za cijeli dokument.
+    """
+    if _REFERENCE_RE.search(text):
+        return [text]
+    blocks = []
+    current = []
+    fence = None
+    blank = False
+    for line in text.splitlines(keepends=True):
+        match = _FENCE_RE.match(line)
+        if fence is None and blank and current and line.strip() and not match \
+                and not _CONTINUATION_RE.match(line):
+            blocks.append(''.join(current))
+            current = []
+        if match:
+            marker = match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        blank = not line.strip()
+        current.append(line)
+    if current:
+        blocks.append(''.join(current))
+    return blocks
+
+
+def render_preview_blocks(text, known=()):
+    """
+    Pregled za editor: lista (hash, HTML) po bloku teksta, istim pipelineom
+    kao spremljene bilješke. Za blokove čiji hash klijent već ima (known)
+    HTML je None; ostali se čitaju iz render_cachea ili renderiraju.
+    """
+    known = set(known)
+    result = []
+    for block in split_blocks(text):
+        # kao ključ u render_markdown, uz verziju renderera: nakon promjene
+        # pipelinea ni cache ni hashevi koje klijent ima ne vrijede
+        key = hashlib.sha256(
+            f'preview\0{RENDER_VERSION}\0{_EXTENSIONS_KEY}\0{block}'.encode('utf-8')
+        ).hexdigest()
+        block_hash = key[:16]
+        if block_hash in known:
+            result.append((block_hash, None))
+            continue
+        html = render_cache.get(key)
+        if html is None:
+            html = render_note_html(block)
+            render_cache.set(key, html, size=len(html.encode('utf-8')))
+        result.append((block_hash, html))
+    return result
@@ -0,0 +1,101 @@
+import re
+import unicodedata
+from flask import current_app
+from .extensions import mongo
+
+# Pretraživanje bilješki. Dva backenda (Config.SEARCH_BACKEND):
+#
+# 'text'  - MongoDB text indeks na title/content s težinama, rangiranje po textScore.
+# 'terms' - za baze bez podrške za text indekse: tokeni se računaju u Pythonu
+#           i spremaju uz bilješku ('search_terms', 'search_title_terms').
+#           Multikey indeks nad tim poljima je invertirani indeks koji se
+#           ažurira inkrementalno, u istom upisu kao i sama bilješka.
+
+TITLE_WEIGHT = 10
+CONTENT_WEIGHT = 1
+
+MIN_TERM_LENGTH = 2
+MAX_QUERY_TERMS = 10
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Razbija tekst u jedinstvene tokene: mala slova, bez dijakritika (č -> c).
+    """
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', str(text).lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    seen = {}
+    for token in _TOKEN_RE.findall(folded):
+        if len(token) >= MIN_TERM_LENGTH and token not in seen:
+            seen[token] = True
+    return list(seen)
+
+
+def search_fields(title, content):
+    """
+    Polja za 'terms' backend koja se spremaju uz bilješku; prazno za 'text' backend.
+    """
+    if current_app.config['SEARCH_BACKEND'] != 'terms':
+        return {}
+    title_terms = tokenize(title)
+    terms = list(dict.fromkeys(title_terms + tokenize(content)))
+    return {'search_terms': terms, 'search_title_terms': title_terms}
+
+
+def search_notes(query, user_id=None, page=1, per_page=20):
+    """
+    Vraća (bilješke, ima_li_sljedeću_stranicu) za upit.
+    user_id=None pretražuje sve bilješke (admin).
+    """
+    max_results = current_app.config['SEARCH_MAX_RESULTS']
+    skip = (page - 1) * per_page
+    if not query or skip >= max_results:
+        return [], False
+    limit = min(per_page, max_results - skip)
+
+    scope = {'user_id': user_id} if user_id is not None else {}
+    if current_app.config['SEARCH_BACKEND'] == 'terms':
+        docs = _search_terms(query, scope, skip, limit + 1)
+    else:
+        docs = _search_text(query, scope, skip, limit + 1)
+
+    has_next = len(docs) > limit and skip + limit < max_results
+    return docs[:limit], has_next
+
+
+def _search_text(query, scope, skip, limit):
+    spec = {'$text': {'$search': query}, **scope}
+    cursor = mongo.db.notes.find(spec, {'score': {'$meta': 'textScore'}})
+    cursor = cursor.sort([('score', {'$meta': 'textScore'}), ('created_at', -1)])
+    return list(cursor.skip(skip).limit(limit))
+
+
+def _matched(field, terms):
+    # broj tokena iz upita u polju (tokeni su jedinstveni)
+    return {'$size': {'$filter': {
+        'input': {'$ifNull': [field, []]},
+        'as': 'term',
+        'cond': {'$in': ['$$term', terms]},
+    }}}
+
+
+def _search_terms(query, scope, skip, limit):
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    pipeline = [
+        {'$match': {**scope, 'search_terms': {'$in': terms}}},
+        {'$addFields': {'score': {'$add': [
+            {'$multiply': [CONTENT_WEIGHT, _matched('$search_terms', terms)]},
+            {'$multiply': [TITLE_WEIGHT, _matched('$search_title_terms', terms)]},
+        ]}}},
+        {'$sort': {'score': -1, 'created_at': -1, '_id': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$project': {'search_terms': 0, 'search_title_terms': 0}},
+    ]
+    return list(mongo.db.notes.aggregate(pipeline))
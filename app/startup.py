@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo.errors import DuplicateKeyError
+from .extensions import mongo
+
+# Zadaci koji se trebaju izvršiti jednom po deployu, a ne u svakom
+# gunicorn workeru. Stanje se drži u kolekciji 'app_meta'.
+
+
+def run_once(name, version, fn):
+    """
+    Pokreće fn() samo ako zadatak 'name' još nije izvršen za 'version'.
+    Prvi worker koji atomski preuzme dokument izvršava zadatak, ostali
+    dobivaju DuplicateKeyError i preskaču ga. Preuzimanje bez finished_at
+    starije od STARTUP_TASK_LEASE sekundi (worker je pao usred zadatka)
+    preuzima idući worker. Vraća True ako je zadatak pokrenut u ovom procesu.
+    """
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config['STARTUP_TASK_LEASE'])
+    try:
+        mongo.db.app_meta.update_one(
+            {'_id': name, '$or': [
+                {'version': {'$ne': version}},
+                {'finished_at': None, 'started_at': {'$lt': now - lease}},
+            ]},
+            {'$set': {'version': version, 'started_at': now, 'finished_at': None, 'error': None}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+
+    try:
+        fn()
+    except Exception as e:
+        # Oslobodi zadatak da ga idući start pokuša ponovno
+        mongo.db.app_meta.update_one(
+            {'_id': name},
+            {'$set': {'version': None, 'error': str(e)}}
+        )
+        current_app.logger.exception("Startup zadatak '%s' nije uspio: %s", name, e)
+        return True
+
+    mongo.db.app_meta.update_one({'_id': name}, {'$set': {'finished_at': datetime.utcnow()}})
+    return True
@@ -0,0 +1,288 @@
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from pymongo import ReturnDocument, UpdateOne, DESCENDING
+from .extensions import mongo
+
+# Statistika za admina, održavana inkrementalno ($inc) pri svakom upisu,
+# tako da je čitanje dashboarda nekoliko dohvata po _id, neovisno o broju
+# bilješki. Dokumenti u kolekciji 'stats':
+#   {'_id': 'global', 'notes', 'users', 'active_users', 'content_bytes', 'version'}
+#   {'_id': 'user:<id>', 'kind': 'user', 'user_id', 'username', 'notes', 'content_bytes', 'version'}
+#   {'_id': 'day:YYYY-MM-DD', 'kind': 'day', 'day', 'notes_created'}
+# 'version' se povećava pri svakoj promjeni bilješki (korisnika, odnosno bilo koje)
+# i koristi se za ETag stranica s bilješkama (app/http_cache.py).
+# `flask stats rebuild` sve ponovno izračunava iz kolekcija notes i users.
+
+GLOBAL_ID = 'global'
+
+
+def note_size(title, content):
+    return len((title or '').encode('utf-8')) + len((content or '').encode('utf-8'))
+
+
+def _user_key(user_id):
+    return f'user:{user_id}'
+
+
+def _day_key(day):
+    return f'day:{day}'
+
+
+def record_user_created(user_id, username):
+    mongo.db.stats.bulk_write([
+        UpdateOne({'_id': GLOBAL_ID}, {'$inc': {'users': 1}}, upsert=True),
+        UpdateOne(
+            {'_id': _user_key(user_id)},
+            {'$set': {'username': username},
+             '$setOnInsert': {'kind': 'user', 'user_id': user_id, 'notes': 0, 'content_bytes': 0}},
+            upsert=True
+        ),
+    ], ordered=False)
+
+
+def record_note_created(user_id, username, size, created_at):
+    user_stats = mongo.db.stats.find_one_and_update(
+        {'_id': _user_key(user_id)},
+        {'$inc': {'notes': 1, 'content_bytes': size, 'version': 1},
+         '$set': {'username': username},
+         '$setOnInsert': {'kind': 'user', 'user_id': user_id}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    # korisnik je postao aktivan (prva bilješka)
+    became_active = 1 if user_stats.get('notes') == 1 else 0
+    day = created_at.strftime('%Y-%m-%d')
+    mongo.db.stats.bulk_write([
+        UpdateOne(
+            {'_id': GLOBAL_ID},
+            {'$inc': {'notes': 1, 'content_bytes': size, 'active_users': became_active, 'version': 1}},
+            upsert=True
+        ),
+        UpdateOne(
+            {'_id': _day_key(day)},
+            {'$inc': {'notes_created': 1}, '$setOnInsert': {'kind': 'day', 'day': day}},
+            upsert=True
+        ),
+    ], ordered=False)
+
+
+def record_notes_imported(notes):
+    """
+    Kao record_note_created, ali za više bilješki odjednom (uvoz).
+    notes: lista (user_id, username, size, created_at).
+    """
+    if not notes:
+        return
+    per_user = {}
+    per_day = {}
+    total_bytes = 0
+    for user_id, username, size, created_at in notes:
+        entry = per_user.setdefault(user_id, {'username': username, 'notes': 0, 'content_bytes': 0})
+        entry['notes'] += 1
+        entry['content_bytes'] += size
+        total_bytes += size
+        day = created_at.strftime('%Y-%m-%d')
+        per_day[day] = per_day.get(day, 0) + 1
+
+    became_active = 0
+    for user_id, entry in per_user.items():
+        user_stats = mongo.db.stats.find_one_and_update(
+            {'_id': _user_key(user_id)},
+            {'$inc': {'notes': entry['notes'], 'content_bytes': entry['content_bytes'], 'version': 1},
+             '$set': {'username': entry['username']},
+             '$setOnInsert': {'kind': 'user', 'user_id': user_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if user_stats.get('notes') == entry['notes']:
+            became_active += 1
+
+    ops = [UpdateOne(
+        {'_id': GLOBAL_ID},
+        {'$inc': {'notes': len(notes), 'content_bytes': total_bytes, 'active_users': became_active, 'version': 1}},
+        upsert=True
+    )]
+    for day, count in per_day.items():
+        ops.append(UpdateOne(
+            {'_id': _day_key(day)},
+            {'$inc': {'notes_created': count}, '$setOnInsert': {'kind': 'day', 'day': day}},
+            upsert=True
+        ))
+    mongo.db.stats.bulk_write(ops, ordered=False)
+
+
+def record_note_updated(user_id, size_delta):
+    # version se povećava i kad se veličina nije promijenila
+    mongo.db.stats.bulk_write([
+        UpdateOne(
+            {'_id': _user_key(user_id)},
+            {'$inc': {'content_bytes': size_delta, 'version': 1},
+             '$setOnInsert': {'kind': 'user', 'user_id': user_id}},
+            upsert=True
+        ),
+        UpdateOne({'_id': GLOBAL_ID}, {'$inc': {'content_bytes': size_delta, 'version': 1}}, upsert=True),
+    ], ordered=False)
+
+
+def record_note_deleted(user_id, size, created_at=None):
+    user_stats = mongo.db.stats.find_one_and_update(
+        {'_id': _user_key(user_id)},
+        {'$inc': {'notes': -1, 'content_bytes': -size, 'version': 1},
+         '$setOnInsert': {'kind': 'user', 'user_id': user_id}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    became_inactive = 1 if user_stats.get('notes') == 0 else 0
+    ops = [UpdateOne(
+        {'_id': GLOBAL_ID},
+        {'$inc': {'notes': -1, 'content_bytes': -size, 'active_users': -became_inactive, 'version': 1}},
+        upsert=True
+    )]
+    # brojač po danu odnosi se na bilješke koje još postoje (isto kao u rebuild())
+    if created_at is not None:
+        ops.append(UpdateOne({'_id': _day_key(created_at.strftime('%Y-%m-%d'))}, {'$inc': {'notes_created': -1}}))
+    mongo.db.stats.bulk_write(ops, ordered=False)
+
+
+def record_notes_deleted(notes):
+    """
+    Kao record_note_deleted, ali za više bilješki odjednom.
+    notes: lista (user_id, size, created_at).
+    """
+    if not notes:
+        return
+    per_user = {}
+    per_day = {}
+    total_bytes = 0
+    for user_id, size, created_at in notes:
+        entry = per_user.setdefault(user_id, {'notes': 0, 'content_bytes': 0})
+        entry['notes'] += 1
+        entry['content_bytes'] += size
+        total_bytes += size
+        if created_at is not None:
+            day = created_at.strftime('%Y-%m-%d')
+            per_day[day] = per_day.get(day, 0) + 1
+
+    became_inactive = 0
+    for user_id, entry in per_user.items():
+        user_stats = mongo.db.stats.find_one_and_update(
+            {'_id': _user_key(user_id)},
+            {'$inc': {'notes': -entry['notes'], 'content_bytes': -entry['content_bytes'], 'version': 1},
+             '$setOnInsert': {'kind': 'user', 'user_id': user_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if user_stats.get('notes') == 0:
+            became_inactive += 1
+
+    ops = [UpdateOne(
+        {'_id': GLOBAL_ID},
+        {'$inc': {'notes': -len(notes), 'content_bytes': -total_bytes,
+                  'active_users': -became_inactive, 'version': 1}},
+        upsert=True
+    )]
+    for day, count in per_day.items():
+        ops.append(UpdateOne({'_id': _day_key(day)}, {'$inc': {'notes_created': -count}}))
+    mongo.db.stats.bulk_write(ops, ordered=False)
+
+
+def read_dashboard(top_users=20, days=30):
+    """
+    Podaci za admin statistiku: globalni brojači, korisnici s najviše
+    bilješki i broj novih bilješki po danu za zadnjih `days` dana.
+    """
+    totals = mongo.db.stats.find_one({'_id': GLOBAL_ID}) or {}
+    users = list(mongo.db.stats.find(
+        {'kind': 'user', 'notes': {'$gt': 0}},
+        {'username': 1, 'notes': 1, 'content_bytes': 1}
+    ).sort('notes', DESCENDING).limit(top_users))
+
+    today = datetime.utcnow().date()
+    day_keys = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+    counts = {
+        doc['day']: doc.get('notes_created', 0)
+        for doc in mongo.db.stats.find({'_id': {'$in': [_day_key(d) for d in day_keys]}})
+    }
+    per_day = [(day, counts.get(day, 0)) for day in day_keys]
+    return totals, users, per_day
+
+
+def rebuild():
+    """
+    Ponovno izračunava sve brojače iz kolekcija notes i users.
+    Upisi koji se dogode tijekom rebuilda mogu se izgubiti; pokretati kad je promet nizak.
+    """
+    token = datetime.utcnow()
+    # samo ovi dokumenti se smiju obrisati na kraju; brojači koje za vrijeme
+    # rebuilda prvi put kreira $inc (novi korisnik, novi dan) ostaju
+    existing = [doc['_id'] for doc in mongo.db.stats.find({}, {'_id': 1})]
+    usernames = {u['_id']: u.get('username') for u in mongo.db.users.find({}, {'username': 1})}
+
+    per_user = {}
+    per_day = {}
+    total_notes = 0
+    total_bytes = 0
+    for note in mongo.db.notes.find({}, {'user_id': 1, 'title': 1, 'content': 1, 'created_at': 1}):
+        size = note_size(note.get('title'), note.get('content'))
+        total_notes += 1
+        total_bytes += size
+        stats = per_user.setdefault(note.get('user_id'), {'notes': 0, 'content_bytes': 0})
+        stats['notes'] += 1
+        stats['content_bytes'] += size
+        if note.get('created_at'):
+            day = note['created_at'].strftime('%Y-%m-%d')
+            per_day[day] = per_day.get(day, 0) + 1
+
+    # $set umjesto zamjene dokumenta: 'version' se ne smije vratiti na staru
+    # vrijednost (ETag), nego se samo povećava
+    ops = [_rebuilt(GLOBAL_ID, token, {
+        'notes': total_notes,
+        'users': len(usernames),
+        'active_users': sum(1 for uid, s in per_user.items() if uid in usernames and s['notes'] > 0),
+        'content_bytes': total_bytes,
+    })]
+    for user_id, username in usernames.items():
+        stats = per_user.get(user_id, {'notes': 0, 'content_bytes': 0})
+        ops.append(_rebuilt(_user_key(user_id), token, {
+            'kind': 'user', 'user_id': user_id, 'username': username, **stats
+        }))
+    for day, count in per_day.items():
+        ops.append(_rebuilt(_day_key(day), token, {'kind': 'day', 'day': day, 'notes_created': count}))
+
+    for i in range(0, len(ops), 1000):
+        mongo.db.stats.bulk_write(ops[i:i + 1000], ordered=False)
+    # dokumenti koje ovaj rebuild nije zapisao (obrisani korisnici, dani bez bilješki)
+    for i in range(0, len(existing), 1000):
+        mongo.db.stats.delete_many({'_id': {'$in': existing[i:i + 1000]}, 'rebuilt_at': {'$ne': token}})
+    return total_notes, len(usernames)
+
+
+def _rebuilt(doc_id, token, fields):
+    return UpdateOne(
+        {'_id': doc_id},
+        {'$set': {**fields, 'rebuilt_at': token}, '$inc': {'version': 1}},
+        upsert=True
+    )
+
+
+def notes_version(user_id=None):
+    """
+    Trenutna verzija bilješki korisnika (user_id=None: svih bilješki).
+    """
+    key = _user_key(user_id) if user_id is not None else GLOBAL_ID
+    doc = mongo.db.stats.find_one({'_id': key}, {'version': 1})
+    return doc.get('version', 0) if doc else 0
+
+
+@click.group('stats')
+def stats_cli():
+    """Admin statistika."""
+
+
+@stats_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Ponovno izračunava brojače statistike iz podataka."""
+    notes, users = rebuild()
+    click.echo(f'Statistika izračunata: {notes} bilješki, {users} korisnika.')
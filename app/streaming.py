@@ -0,0 +1,45 @@
+from flask import current_app, render_template, session, stream_template
+
+# Streaming predložaka (STREAM_TEMPLATES): HTML se šalje u dijelovima dok se
+# predložak renderira, pa preglednik odmah dobije <head> (CSS se počinje
+# učitavati), a redovi stranice (LazyPage) stižu kako se čitaju iz baze.
+
+
+def streaming_enabled():
+    # flash poruke se čitaju (i brišu iz sessiona) tijekom renderiranja, a
+    # streamani odgovor je već poslao kolačić, pa se takve stranice ne streamaju
+    return current_app.config['STREAM_TEMPLATES'] and not session.get('_flashes')
+
+
+def _chunked(pieces, size):
+    # spaja male dijelove iz Jinje u dijelove od ~size znakova;
+    # prvi dio šalje se odmah nakon </head>
+    buffer = []
+    length = 0
+    head_sent = False
+    try:
+        for piece in pieces:
+            buffer.append(piece)
+            length += len(piece)
+            if length >= size or (not head_sent and '</head>' in piece):
+                head_sent = True
+                yield ''.join(buffer)
+                buffer = []
+                length = 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        # zatvara stream_with_context (i kontekst zahtjeva) i kad klijent prekine vezu
+        pieces.close()
+
+
+def render_page(template_name, stream=False, **context):
+    """
+    render_template(), ili streamani odgovor ako je stream=True.
+    """
+    if not stream:
+        return render_template(template_name, **context)
+    pieces = stream_template(template_name, **context)
+    return current_app.response_class(
+        _chunked(pieces, current_app.config['STREAM_CHUNK_SIZE']), mimetype='text/html'
+    )
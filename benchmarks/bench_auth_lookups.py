@@ -0,0 +1,87 @@
+"""
+Broji MongoDB round tripove i mjeri vrijeme za lookupove pri prijavi i
+registraciji: stari način (get_by_username + get_by_email) naspram
+User.find_by_login / User.find_conflicts.
+
+Treba pravi MongoDB (round tripovi se broje preko pymongo CommandListenera):
+    MONGO_URI=mongodb://localhost:27017/notes_bench python benchmarks/bench_auth_lookups.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name in ('find', 'aggregate'):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+counter = CommandCounter()
+monitoring.register(counter)
+
+os.environ.setdefault('SECRET_KEY', 'bench')
+from app import create_app
+from app.extensions import mongo
+from app.models import User
+from app.indexes import ensure_indexes
+
+
+def measure(label, fn, identifiers, repeat):
+    counter.count = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for identifier in identifiers:
+            fn(identifier)
+    elapsed = time.perf_counter() - start
+    calls = repeat * len(identifiers)
+    print(f'{label:<38}{counter.count / calls:>8.2f} rt/zahtjev{elapsed / calls * 1e3:>10.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        mongo.db.users.delete_many({'username': {'$regex': '^bench_'}})
+        mongo.db.users.insert_many([
+            {'username': f'bench_{i}', 'email': f'bench_{i}@example.com', 'password_hash': 'x',
+             'email_confirmed': True, 'roles': ['user']}
+            for i in range(args.users)
+        ])
+        ensure_indexes()
+
+        # prijava korisničkim imenom, emailom i nepostojećim korisnikom
+        logins = ['bench_1', 'bench_2@example.com', 'nepostojeci']
+        measure('login: get_by_username or get_by_email',
+                lambda x: User.get_by_username(x) or User.get_by_email(x), logins, args.repeat)
+        measure('login: find_by_login', User.find_by_login, logins, args.repeat)
+
+        signups = [('novi_1', 'novi_1@example.com'), ('bench_3', 'bench_4@example.com')]
+        measure('register: two validators',
+                lambda p: (User.get_by_username(p[0]), User.get_by_email(p[1])), signups, args.repeat)
+        measure('register: find_conflicts',
+                lambda p: User.find_conflicts(*p), signups, args.repeat)
+
+        mongo.db.users.delete_many({'username': {'$regex': '^bench_'}})
+
+
+if __name__ == '__main__':
+    main()
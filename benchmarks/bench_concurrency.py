@@ -0,0 +1,191 @@
+"""
+Skaliranje s brojem istovremenih zahtjeva na I/O stranicama (popis
+bilješki): za svaku postavku gunicorna (klasa workera, workeri, dretve)
+pokreće gunicorn s gunicorn.conf.py i mjeri req/s i latenciju pri
+različitom broju istovremenih klijenata.
+
+--backend mongod: lokalni MongoDB (MONGO_URI), stvarna mrežna latencija.
+--backend mongomock: baza u memoriji jednog workera (samo workers=1), uz
+umjetno kašnjenje svake operacije (--latency-ms) kao zamjenu za round trip
+do Atlasa.
+
+    python benchmarks/bench_concurrency.py --backend mongomock --latency-ms 20
+    MONGO_URI=mongodb://localhost:27017/notes_bench python benchmarks/bench_concurrency.py \\
+        --backend mongod --configs sync:2:1,gthread:2:8 --concurrency 1,8,32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import loadtest  # noqa: E402
+
+# operacije mongomock kolekcije koje dobivaju umjetno kašnjenje
+_MONGOMOCK_OPS = (
+    'find', 'find_one', 'insert_one', 'insert_many', 'update_one', 'update_many', 'find_one_and_update',
+    'delete_one', 'delete_many', 'aggregate', 'count_documents', 'bulk_write',
+)
+
+
+def _add_latency(seconds):
+    import mongomock
+
+    def delayed(method):
+        def wrapper(*args, **kwargs):
+            time.sleep(seconds)
+            return method(*args, **kwargs)
+        return wrapper
+
+    for name in _MONGOMOCK_OPS:
+        setattr(mongomock.collection.Collection, name, delayed(getattr(mongomock.collection.Collection, name)))
+
+
+def bench_app():
+    """
+    App factory za gunicorn ('bench_concurrency:bench_app()'). Uz mongomock
+    se baza puni u workeru, nakon dodavanja kašnjenja.
+    """
+    from app import create_app
+    if os.environ['BENCH_BACKEND'] == 'mongomock':
+        loadtest.use_mongomock()
+        app = create_app()
+        with app.app_context():
+            loadtest.seed(int(os.environ['BENCH_USERS']), int(os.environ['BENCH_NOTES']))
+        _add_latency(float(os.environ['BENCH_LATENCY_MS']) / 1000)
+        return app
+    return create_app()
+
+
+def start_server(worker_class, workers, threads, env):
+    port = loadtest.free_port()
+    env = dict(env, PORT=str(port), GUNICORN_WORKER_CLASS=worker_class,
+               WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+               '--chdir', BENCH_DIR, 'bench_concurrency:bench_app()']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/health', timeout=1).read()
+            return process, base_url
+        except OSError:
+            if process.poll() is not None:
+                sys.exit(f'gunicorn ({worker_class}) se nije pokrenuo.')
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit('gunicorn nije odgovorio na /health.')
+
+
+def measure(sessions, requests):
+    per_client = max(1, requests // len(sessions))
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def loop(session):
+        local = []
+        failed = 0
+        for _ in range(per_client):
+            started = time.perf_counter()
+            status = session.get('/notes/')[0]
+            local.append(time.perf_counter() - started)
+            failed += status != 200
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    for session in sessions:
+        session.get('/notes/')  # zagrijavanje
+    threads = [threading.Thread(target=loop, args=(session,)) for session in sessions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': ms(loadtest.percentile(latencies, 0.50)),
+        'p95_ms': ms(loadtest.percentile(latencies, 0.95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=('mongomock', 'mongod'), default='mongomock')
+    parser.add_argument('--latency-ms', type=float, default=20, help='kašnjenje po operaciji (mongomock)')
+    parser.add_argument('--configs', default='sync:1:1,gthread:1:8,gthread:1:16',
+                        help='klasa:workeri:dretve, odvojeno zarezom')
+    parser.add_argument('--concurrency', default='1,4,8,16', help='broj istovremenih klijenata')
+    parser.add_argument('--requests', type=int, default=160, help='zahtjeva po mjerenju')
+    parser.add_argument('--notes', type=int, default=20, help='bilješki po korisniku')
+    parser.add_argument('--output', help='JSON rezultat u datoteku')
+    args = parser.parse_args()
+
+    configs = [(c.split(':')[0], int(c.split(':')[1]), int(c.split(':')[2])) for c in args.configs.split(',')]
+    levels = [int(n) for n in args.concurrency.split(',')]
+    if args.backend == 'mongomock' and any(workers != 1 for _, workers, _ in configs):
+        parser.error('mongomock: baza je u memoriji workera, dozvoljen je samo 1 worker')
+
+    users = max(levels)
+    limit = '1000000 per second'
+    env = dict(
+        os.environ, SECRET_KEY=os.environ.get('SECRET_KEY', 'bench'), RUN_STARTUP_TASKS='False',
+        MAIL_DEFAULT_SENDER='bench@example.com', RATELIMIT_DEFAULT=limit, RATELIMIT_LOGIN=limit,
+        MONGO_MAX_POOL_SIZE=str(max(threads for _, _, threads in configs)),
+        BENCH_BACKEND=args.backend, BENCH_LATENCY_MS=str(args.latency_ms),
+        BENCH_USERS=str(users), BENCH_NOTES=str(args.notes),
+    )
+    if args.backend == 'mongomock':
+        env['MONGO_URI'] = 'mongodb://localhost/notes_bench'
+    else:
+        env.setdefault('MONGO_URI', 'mongodb://localhost:27017/notes_bench')
+        os.environ.update(env)
+        from app import create_app
+        app = create_app()
+        with app.app_context():
+            loadtest.seed(users, args.notes)
+
+    print(f'{"postavka":<18}{"klijenti":>9}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"greške":>8}')
+    results = []
+    try:
+        for worker_class, workers, threads in configs:
+            process, base_url = start_server(worker_class, workers, threads, env)
+            try:
+                sessions = [loadtest.login(loadtest.HttpSession(base_url), f'{loadtest.PREFIX}user_{i}')
+                            for i in range(users)]
+                for level in levels:
+                    r = measure(sessions[:level], args.requests)
+                    name = f'{worker_class}:{workers}:{threads}'
+                    results.append({'config': name, 'clients': level, **r})
+                    print(f'{name:<18}{level:>9}{r["rps"]:>9.1f}{r["p50_ms"]:>9.1f}'
+                          f'{r["p95_ms"]:>9.1f}{r["errors"]:>8}', flush=True)
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        if args.backend == 'mongod':
+            with app.app_context():
+                loadtest.cleanup()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'backend': args.backend, 'latency_ms': args.latency_ms, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Propusnost prijave za različite postavke hashiranja lozinki: za svaku
+metodu (PASSWORD_HASH_METHOD) i veličinu poola (PASSWORD_POOL_WORKERS)
+pokreće scenarij 'login' iz loadtest.py u zasebnom procesu i ispisuje
+req/s i latenciju, uz trajanje jedne provjere hasha bez aplikacije.
+
+    python benchmarks/bench_password_hashing.py --threads 4
+    python benchmarks/bench_password_hashing.py --methods scrypt:16384:8:1,pbkdf2:sha256:600000 \\
+        --pools 0,2 --output hashing.json
+
+Ostali argumenti (npr. --backend mongod --gunicorn) prosljeđuju se loadtest.py.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOADTEST = os.path.join(ROOT, 'benchmarks', 'loadtest.py')
+
+DEFAULT_METHODS = 'scrypt:32768:8:1,scrypt:16384:8:1,pbkdf2:sha256:600000,pbkdf2:sha256:260000'
+
+
+def verify_ms(method, rounds=5):
+    password_hash = generate_password_hash('bench-password', method)
+    seconds = timeit.timeit(lambda: check_password_hash(password_hash, 'bench-password'), number=rounds)
+    return seconds / rounds * 1000
+
+
+def run_login(method, pool, args, extra):
+    env = dict(os.environ, PASSWORD_HASH_METHOD=method, PASSWORD_POOL_WORKERS=str(pool))
+    with tempfile.NamedTemporaryFile(suffix='.json') as output:
+        subprocess.run(
+            [sys.executable, LOADTEST, '--scenarios', 'login', '--threads', str(args.threads),
+             '--requests', str(args.requests), '--users', str(args.threads), '--notes', '0',
+             '--output', output.name, *extra],
+            cwd=ROOT, env=env, check=True, stderr=subprocess.DEVNULL
+        )
+        return json.load(output)['results']['login']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='metode odvojene zarezom')
+    parser.add_argument('--pools', default='0,1,2', help='PASSWORD_POOL_WORKERS vrijednosti odvojene zarezom')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=40, help='prijava po mjerenju')
+    parser.add_argument('--output', help='JSON rezultat u datoteku')
+    args, extra = parser.parse_known_args()
+
+    methods = [m.strip() for m in args.methods.split(',') if m.strip()]
+    pools = [int(p) for p in args.pools.split(',') if p.strip()]
+
+    print(f'{"metoda":<24}{"verify ms":>10}{"pool":>6}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"greške":>8}')
+    results = []
+    for method in methods:
+        single = verify_ms(method)
+        for pool in pools:
+            r = run_login(method, pool, args, extra)
+            results.append({'method': method, 'verify_ms': round(single, 2), 'pool_workers': pool, **r})
+            print(f'{method:<24}{single:>10.1f}{pool:>6}{r["rps"]:>9.1f}{r["p50_ms"]:>9.1f}'
+                  f'{r["p95_ms"]:>9.1f}{r["errors"]:>8}', flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'threads': args.threads, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Mjeri hladni start workera: vrijeme importa paketa 'app' i create_app(),
+svaki put u novom Python procesu. Ispisuje i najskuplje importe (-X importtime).
+
+Pokretanje iz korijena repozitorija:
+    MONGO_URI=mongodb://localhost:27017/notes_bench python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --no-startup-tasks   # bez MongoDB-a
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000}))
+"""
+
+
+def run_child(env, extra_args=()):
+    out = subprocess.run(
+        [sys.executable, *extra_args, '-c', CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help='broj najskupljih importa za ispis')
+    parser.add_argument('--no-startup-tasks', action='store_true', help='RUN_STARTUP_TASKS=False')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('SECRET_KEY', 'bench')
+    env.setdefault('MONGO_URI', 'mongodb://localhost:27017/notes_bench')
+    if args.no_startup_tasks:
+        env['RUN_STARTUP_TASKS'] = 'False'
+
+    results = [json.loads(run_child(env).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+    for key in ('import_ms', 'create_app_ms'):
+        values = [r[key] for r in results]
+        print(f'{key:<15} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms   max {max(values):8.1f} ms')
+
+    # importtime: "import time: self | cumulative | modul"
+    stderr = run_child(env, ('-X', 'importtime')).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    print('\nNajskuplji importi (kumulativno):')
+    for cumulative, module in sorted(rows, reverse=True)[:args.top]:
+        print(f'{cumulative / 1000:8.1f} ms  {module}')
+
+
+if __name__ == '__main__':
+    main()
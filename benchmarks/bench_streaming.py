@@ -0,0 +1,96 @@
+"""
+Uspoređuje render_template i streaming (STREAM_TEMPLATES) za popis bilješki
+i admin tablicu: vrijeme do prvog bajta (TTFB), ukupno vrijeme i najveću
+zauzetu memoriju (tracemalloc) po zahtjevu, za jednu veliku stranicu.
+
+Treba pravi MongoDB (koristi zasebnu bazu, bilješke korisnika bench_stream se brišu):
+    MONGO_URI=mongodb://localhost:27017/notes_bench python benchmarks/bench_streaming.py --notes 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('RUN_STARTUP_TASKS', 'False')
+from app import create_app
+from app.extensions import mongo
+from app.models import User
+from app.rendering import rendered_fields
+
+USERNAME = 'bench_stream'
+
+
+def seed(count):
+    user = User.get_by_username(USERNAME)
+    if user is None:
+        user = User.create(USERNAME, f'{USERNAME}@example.com', 'bench-password', roles=['user', 'admin'])
+    user_id = user._data['_id']
+    mongo.db.notes.delete_many({'user_id': user_id})
+    content = '## Bilješka\n\nNeki **tekst** s [linkom](https://example.com).\n\n' + 'lorem ipsum ' * 40
+    now = datetime.utcnow()
+    fields = rendered_fields(content)
+    mongo.db.notes.insert_many([
+        {'user_id': user_id, 'title': f'Bilješka {i}', 'content': content,
+         'created_at': now - timedelta(seconds=i), **fields}
+        for i in range(count)
+    ])
+    return user_id
+
+
+def measure(client, url):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    ttfb = time.perf_counter() - start
+    size = len(first) + sum(len(chunk) for chunk in chunks)
+    total = time.perf_counter() - start
+    response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ttfb, total, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=2000, help='broj bilješki na stranici')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    # jedna stranica sa svim bilješkama; bez ETag/304 i kompresije da se mjeri samo renderiranje
+    app.config.update(
+        TESTING=True, NOTES_PER_PAGE=args.notes, ADMIN_NOTES_PER_PAGE=args.notes,
+        HTTP_CACHE_ENABLED=False, COMPRESS_ENABLED=False, RATELIMIT_ENABLED=False,
+    )
+    with app.app_context():
+        user_id = seed(args.notes)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    print(f'{"":<42}{"TTFB ms":>10}{"ukupno ms":>12}{"peak KB":>10}{"KB HTML":>10}')
+    for url in ('/notes/', '/notes/admin/dashboard'):
+        for stream in (False, True):
+            app.config['STREAM_TEMPLATES'] = stream
+            measure(client, url)  # zagrijavanje (predlošci, cache Markdowna)
+            runs = [measure(client, url) for _ in range(args.repeat)]
+            ttfb, total, peak, size = (statistics.median(values) for values in zip(*runs))
+            label = f'{url} ({"stream" if stream else "render_template"})'
+            print(f'{label:<42}{ttfb * 1e3:>10.1f}{total * 1e3:>12.1f}{peak / 1024:>10.0f}{size / 1024:>10.0f}')
+
+    with app.app_context():
+        mongo.db.notes.delete_many({'user_id': user_id})
+
+
+if __name__ == '__main__':
+    main()
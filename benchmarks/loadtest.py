@@ -0,0 +1,473 @@
+"""
+Load test glavnih ruta: prijava, registracija, popis bilješki, admin tablica
+i nova bilješka. Za svaki scenarij mjeri zahtjeve u sekundi, latenciju
+(p50/p95/p99), memoriju procesa i broj neočekivanih statusa; rezultat je
+JSON (uz commit), pa se može uspoređivati između commitova.
+
+Baza: --backend mongomock (u memoriji, treba paket 'mongomock') ili
+--backend mongod (lokalni MongoDB, MONGO_URI; dira samo korisnike 'bench_*'
+i njihove bilješke). Aplikacija se poziva preko Flask test clienta ili, s
+--gunicorn, preko HTTP-a na lokalno pokrenuti gunicorn (samo uz mongod).
+
+    python benchmarks/loadtest.py --backend mongomock --output before.json
+    python benchmarks/loadtest.py --backend mongomock --compare before.json
+    MONGO_URI=mongodb://localhost:27017/notes_bench \\
+        python benchmarks/loadtest.py --backend mongod --gunicorn --threads 8
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import re
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PREFIX = 'bench_'
+PASSWORD = 'bench-password'
+ADMIN = f'{PREFIX}admin'
+SCENARIOS = ('login', 'register', 'list_notes', 'admin_dashboard', 'create_note')
+
+NOTE_CONTENT = (
+    '## Bilješka {i}\n\nNeki **tekst** s [linkom](https://example.com) i `kodom`.\n\n'
+    '- stavka jedan\n- stavka dva\n\n' + 'lorem ipsum dolor sit amet ' * 20
+)
+
+_CSRF_RE = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+# --- baza ------------------------------------------------------------------
+
+def use_mongomock():
+    """
+    Zamjenjuje MongoClient u Flask-PyMongo jednim mongomock klijentom.
+    """
+    try:
+        import mongomock
+        import mongomock.collection
+    except ImportError:
+        sys.exit('--backend mongomock traži paket mongomock (pip install mongomock)')
+    import flask_pymongo
+
+    # pymongo 4.x prosljeđuje 'sort' bulk operacijama, mongomock ga ne poznaje
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ('add_update', 'add_replace'):
+        original = getattr(builder, name)
+        setattr(builder, name, lambda self, *a, sort=None, _original=original, **kw: _original(self, *a, **kw))
+
+    client = mongomock.MongoClient()
+    flask_pymongo.MongoClient = lambda *args, **kwargs: client
+
+
+def seed(users, notes_per_user):
+    from app.extensions import mongo
+    from app.passwords import password_hasher
+    from app.rendering import rendered_fields
+    from app.search import search_fields
+
+    cleanup()
+    # metodom iz PASSWORD_HASH_METHOD, da prijave ne mjere rehash
+    password_hash = password_hasher.hash(PASSWORD)
+    docs = [
+        {'username': f'{PREFIX}user_{i}', 'email': f'{PREFIX}user_{i}@example.com',
+         'password_hash': password_hash, 'email_confirmed': True, 'roles': ['user']}
+        for i in range(users)
+    ]
+    docs.append({'username': ADMIN, 'email': f'{ADMIN}@example.com', 'password_hash': password_hash,
+                 'email_confirmed': True, 'roles': ['admin']})
+    user_ids = mongo.db.users.insert_many(docs).inserted_ids[:users]
+
+    # nekoliko različitih sadržaja; renderiraju se jednom
+    variants = []
+    for i in range(10):
+        content = NOTE_CONTENT.format(i=i)
+        variants.append((content, rendered_fields(content)))
+    now = datetime.utcnow()
+    batch = []
+    for user_index, user_id in enumerate(user_ids):
+        for i in range(notes_per_user):
+            content, fields = variants[i % len(variants)]
+            title = f'Bilješka {user_index}-{i}'
+            batch.append({'user_id': user_id, 'title': title, 'content': content,
+                          'created_at': now - timedelta(seconds=i), **fields, **search_fields(title, content)})
+            if len(batch) >= 1000:
+                mongo.db.notes.insert_many(batch)
+                batch = []
+    if batch:
+        mongo.db.notes.insert_many(batch)
+
+
+def cleanup():
+    from app.extensions import mongo
+    bench_users = {'username': {'$regex': f'^{PREFIX}'}}
+    ids = [doc['_id'] for doc in mongo.db.users.find(bench_users, {'_id': 1})]
+    mongo.db.notes.delete_many({'user_id': {'$in': ids}})
+    mongo.db.users.delete_many(bench_users)
+
+
+# --- klijenti ---------------------------------------------------------------
+
+class TestClientSession:
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def get(self, path):
+        response = self._client.get(path)
+        body = response.get_data(as_text=True)  # streamani odgovor se čita do kraja
+        response.close()
+        return response.status_code, body
+
+    def post(self, path, data):
+        response = self._client.post(path, data=data)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+    def csrf_token(self, path):
+        return None  # CSRF je isključen u test clientu
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self._base_url = base_url
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def _open(self, request):
+        try:
+            with self._opener.open(request, timeout=60) as response:
+                return response.status, response.read().decode('utf-8')
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, ''
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self._base_url + path))
+
+    def post(self, path, data):
+        body = urllib.parse.urlencode(data).encode('utf-8')
+        return self._open(urllib.request.Request(self._base_url + path, data=body))[0]
+
+    def csrf_token(self, path):
+        match = _CSRF_RE.search(self.get(path)[1])
+        return match.group(1) if match else None
+
+
+def login(session, username):
+    data = {'username': username, 'password': PASSWORD}
+    token = session.csrf_token('/auth/login')
+    if token:
+        data['csrf_token'] = token
+    status = session.post('/auth/login', data)
+    if status != 302:
+        sys.exit(f'Prijava korisnika {username} nije uspjela (status {status}).')
+    return session
+
+
+# --- scenariji ----------------------------------------------------------------
+# Svaki scenarij: prepare(nova_sesija, dretva, i) -> kontekst (ne mjeri se),
+# run(kontekst) -> HTTP status (mjeri se) i očekivani status.
+
+def _login_prepare(new_session, worker, i):
+    session = new_session()
+    data = {'username': f'{PREFIX}user_{i % worker.users}', 'password': PASSWORD}
+    token = session.csrf_token('/auth/login')
+    if token:
+        data['csrf_token'] = token
+    return session, data
+
+
+def _register_prepare(new_session, worker, i):
+    session = new_session()
+    name = f'{PREFIX}r{worker.run_id}_{worker.index}_{i}'
+    data = {'username': name, 'email': f'{name}@example.com',
+            'password': PASSWORD, 'confirm_password': PASSWORD}
+    token = session.csrf_token('/auth/register')
+    if token:
+        data['csrf_token'] = token
+    return session, data
+
+
+def _post(path):
+    return lambda context: context[0].post(path, context[1])
+
+
+def _get(path):
+    return lambda session: session.get(path)[0]
+
+
+SCENARIO_SPECS = {
+    'login': (_login_prepare, _post('/auth/login'), 302),
+    'register': (_register_prepare, _post('/auth/register'), 302),
+    'list_notes': (lambda new_session, worker, i: worker.user_session, _get('/notes/'), 200),
+    'admin_dashboard': (lambda new_session, worker, i: worker.admin_session, _get('/notes/admin/dashboard'), 200),
+    'create_note': (
+        lambda new_session, worker, i: (worker.user_session, {
+            'title': f'Nova bilješka {worker.index}-{i}', 'content': NOTE_CONTENT.format(i=i)
+        }),
+        _post('/notes/create'),
+        302,
+    ),
+}
+
+
+class Worker:
+    def __init__(self, index, new_session, users, run_id):
+        self.index = index
+        self.users = users
+        self.run_id = run_id
+        # prijavljene sesije (za list_notes i create_note korisnik ovisi o dretvi)
+        self.user_session = login(new_session(), f'{PREFIX}user_{index % users}')
+        self.admin_session = login(new_session(), ADMIN)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def rss_bytes(pid=None):
+    """
+    Trenutni RSS procesa (i njegove djece, npr. gunicorn workera); samo Linux.
+    """
+    pids = [pid or os.getpid()]
+    if pid is not None:
+        try:
+            with open(f'/proc/{pid}/task/{pid}/children') as f:
+                pids += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    total = 0
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/statm') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            return None
+    return total
+
+
+def run_scenario(name, workers, new_session, requests, warmup, server_pid):
+    prepare, run, expected = SCENARIO_SPECS[name]
+    per_worker = max(1, requests // len(workers))
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def loop(worker, count, offset, record):
+        local = []
+        failed = 0
+        for i in range(offset, offset + count):
+            context = prepare(new_session, worker, i)
+            started = time.perf_counter()
+            status = run(context)
+            local.append(time.perf_counter() - started)
+            if status != expected:
+                failed += 1
+        if record:
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+    for worker in workers:
+        loop(worker, warmup, 10 ** 6, record=False)
+
+    rss_before = rss_bytes(server_pid)
+    threads = [
+        threading.Thread(target=loop, args=(worker, per_worker, 0, True)) for worker in workers
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_after = rss_bytes(server_pid)
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': ms(statistics.fmean(latencies)) if latencies else 0.0,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1]) if latencies else 0.0,
+        'rss_mb': round(rss_after / 2 ** 20, 1) if rss_after is not None else None,
+        'rss_growth_mb': round((rss_after - rss_before) / 2 ** 20, 1) if None not in (rss_before, rss_after) else None,
+    }
+
+
+# --- gunicorn -----------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(args):
+    port = free_port()
+    env = dict(os.environ, RUN_STARTUP_TASKS='False')
+    command = [sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', *args.gunicorn_args.split(), 'run:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/health', timeout=1).read()
+            return process, base_url
+        except OSError:
+            if process.poll() is not None:
+                sys.exit('gunicorn se nije pokrenuo.')
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit('gunicorn nije odgovorio na /health.')
+
+
+# --- izvještaj ----------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f'{"scenarij":<17}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"RSS MB":>8}{"greške":>8}'
+    if baseline:
+        header += f'{"Δ req/s":>10}{"Δ p95":>9}'
+    print(header, file=sys.stderr)
+    for name, r in results.items():
+        line = (f'{name:<17}{r["rps"]:>9.1f}{r["p50_ms"]:>9.2f}{r["p95_ms"]:>9.2f}{r["p99_ms"]:>9.2f}'
+                f'{r["rss_mb"] if r["rss_mb"] is not None else "-":>8}{r["errors"]:>8}')
+        old = (baseline or {}).get(name)
+        if old and old['rps'] and old['p95_ms']:
+            line += f'{(r["rps"] / old["rps"] - 1) * 100:>+9.1f}%{(r["p95_ms"] / old["p95_ms"] - 1) * 100:>+8.1f}%'
+        print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=('mongomock', 'mongod'), default='mongomock')
+    parser.add_argument('--users', type=int, default=20, help='broj korisnika za seed')
+    parser.add_argument('--notes', type=int, default=100, help='broj bilješki po korisniku')
+    parser.add_argument('--requests', type=int, default=200, help='zahtjeva po scenariju')
+    parser.add_argument('--warmup', type=int, default=5, help='zahtjeva za zagrijavanje po dretvi')
+    parser.add_argument('--threads', type=int, default=1, help='istovremenih klijenata')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--gunicorn', action='store_true', help='HTTP prema lokalnom gunicornu umjesto test clienta')
+    parser.add_argument('--gunicorn-args', default='-w 2', help='dodatni argumenti za gunicorn')
+    parser.add_argument('--rate-limit', default='1000000 per second',
+                        help='limit za sve rute (zadano praktički bez ograničenja, ali s troškom provjere)')
+    parser.add_argument('--output', help='JSON rezultat u datoteku (inače na stdout)')
+    parser.add_argument('--compare', help='JSON prethodnog mjerenja za usporedbu')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'nepoznati scenariji: {", ".join(sorted(unknown))}')
+    if args.gunicorn and args.backend != 'mongod':
+        parser.error('--gunicorn radi samo s --backend mongod (workeri ne dijele mongomock)')
+
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    os.environ['RUN_STARTUP_TASKS'] = 'False'
+    os.environ.setdefault('MAIL_DEFAULT_SENDER', 'bench@example.com')
+    os.environ.update(RATELIMIT_DEFAULT=args.rate_limit, RATELIMIT_LOGIN=args.rate_limit,
+                      RATELIMIT_REGISTER=args.rate_limit)
+    if args.backend == 'mongomock':
+        os.environ['MONGO_URI'] = 'mongodb://localhost/notes_bench'
+        use_mongomock()
+    else:
+        os.environ.setdefault('MONGO_URI', 'mongodb://localhost:27017/notes_bench')
+
+    from app import create_app
+    app = create_app()
+
+    with app.app_context():
+        if args.backend == 'mongod':
+            from app.indexes import ensure_indexes
+            ensure_indexes()
+        seed(args.users, args.notes)
+
+    process = None
+    if args.gunicorn:
+        process, base_url = start_gunicorn(args)
+        new_session = lambda: HttpSession(base_url)
+        server_pid = process.pid
+    else:
+        # forme bez CSRF tokena, mail se ne šalje
+        app.config.update(WTF_CSRF_ENABLED=False)
+        app.extensions['mail'].suppress = True
+        new_session = lambda: TestClientSession(app)
+        server_pid = None
+
+    run_id = int(time.time()) % 100000  # korisničko ime najviše 25 znakova
+    results = {}
+    try:
+        workers = [Worker(i, new_session, args.users, run_id) for i in range(args.threads)]
+        for name in scenarios:
+            results[name] = run_scenario(name, workers, new_session, args.requests, args.warmup, server_pid)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        with app.app_context():
+            cleanup()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'driver': 'gunicorn' if args.gunicorn else 'test_client',
+            'users': args.users,
+            'notes_per_user': args.notes,
+            'requests': args.requests,
+            'threads': args.threads,
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f).get('results')
+    print_table(results, baseline)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
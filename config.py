@@ -6,6 +6,20 @@ class Config:
 
     # MongoDB
     MONGO_URI = os.environ.get('MONGO_URI')
+    # Connection pool (po gunicorn workeru; ukupno = workeri x MONGO_MAX_POOL_SIZE
+    # mora stati u limit veza na Atlasu)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 20))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 20000))
+    # Kompresija mreže; zstd i snappy traže pakete 'zstandard' / 'python-snappy',
+    # nedostupni se preskaču
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib')
+    # CA certifikati za TLS (za mongodb+srv:// se koristi certifi ako nije zadano)
+    MONGO_TLS_CA_FILE = os.environ.get('MONGO_TLS_CA_FILE')
 
     # Flask-Mail (podaci se čitaju iz .env)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
@@ -16,6 +30,16 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')     # Google App Password
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
 
+    # Red za slanje maila (pozadinske dretve + outbox u MongoDB-u)
+    MAIL_QUEUE_ENABLED = os.environ.get('MAIL_QUEUE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE', 1000))
+    MAIL_QUEUE_WORKERS = int(os.environ.get('MAIL_QUEUE_WORKERS', 2))
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 20))
+    MAIL_QUEUE_MAX_RETRIES = int(os.environ.get('MAIL_QUEUE_MAX_RETRIES', 5))
+    MAIL_QUEUE_BACKOFF = int(os.environ.get('MAIL_QUEUE_BACKOFF', 30))  # sekunde, udvostručuje se
+    MAIL_QUEUE_POLL_INTERVAL = int(os.environ.get('MAIL_QUEUE_POLL_INTERVAL', 15))
+    MAIL_QUEUE_LEASE = int(os.environ.get('MAIL_QUEUE_LEASE', 300))
+
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
@@ -23,3 +47,112 @@ class Config:
     USER_USERNAME = os.environ.get('USER_USERNAME')
     USER_EMAIL = os.environ.get('USER_EMAIL')
     USER_PASSWORD = os.environ.get('USER_PASSWORD')
+
+    # Indeksi i default korisnici pri startu (jednom po deployu, vidi app.startup)
+    RUN_STARTUP_TASKS = os.environ.get('RUN_STARTUP_TASKS', 'True').lower() in ('true', '1', 'yes')
+    # koliko dugo (sekunde) zadatak smije trajati prije nego ga preuzme drugi worker
+    STARTUP_TASK_LEASE = int(os.environ.get('STARTUP_TASK_LEASE', 600))
+
+    # Rate limiting (Flask-Limiter). Storage: 'memory://' (zasebni brojači u svakom
+    # workeru) ili 'app-mongodb://' (brojači u bazi aplikacije, zajednički svim
+    # workerima; vidi app/ratelimit.py). Ako storage nije dostupan, limiti se
+    # privremeno broje u memoriji umjesto da zahtjev padne.
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'moving-window')
+    RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', '100 per minute')
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True
+    RATELIMIT_SWALLOW_ERRORS = True
+    # strože granice za POST na prijavu i registraciju (po IP adresi)
+    RATELIMIT_LOGIN = os.environ.get('RATELIMIT_LOGIN', '10 per minute;50 per hour')
+    RATELIMIT_REGISTER = os.environ.get('RATELIMIT_REGISTER', '5 per minute;20 per hour')
+    # pregled Markdowna u editoru (zahtjevi se šalju najviše jednom u PREVIEW_DEBOUNCE_MS)
+    RATELIMIT_PREVIEW = os.environ.get('RATELIMIT_PREVIEW', '120 per minute')
+
+    # Hashiranje lozinki (werkzeug), npr. 'scrypt:32768:8:1' ili 'pbkdf2:sha256:600000'.
+    # Hashevi s drugom metodom/parametrima zamjenjuju se pri sljedećoj prijavi.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    # Provjera/hashiranje u poolu procesa (po workeru; 0 = u dretvi zahtjeva),
+    # najviše zahtjeva koji čekaju na pool i koliko dugo (sekunde)
+    PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', 1))
+    PASSWORD_POOL_MAX_PENDING = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', 8))
+    PASSWORD_POOL_TIMEOUT = float(os.environ.get('PASSWORD_POOL_TIMEOUT', 10))
+
+    # Mjerenje zahtjeva (app/monitoring.py): Server-Timing zaglavlje, /metrics
+    # (Prometheus, po workeru) i log sporih zahtjeva/upita ('app.slow', JSON).
+    # /metrics traži 'Authorization: Bearer <METRICS_TOKEN>'; bez tokena je
+    # isključen (404), osim ako je METRICS_PUBLIC=True (npr. samo interna mreža)
+    MONITORING_ENABLED = os.environ.get('MONITORING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 1000))
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False').lower() in ('true', '1', 'yes')
+
+    # Paginacija bilješki (broj bilješki po stranici)
+    NOTES_PER_PAGE = int(os.environ.get('NOTES_PER_PAGE', 20))
+    ADMIN_NOTES_PER_PAGE = int(os.environ.get('ADMIN_NOTES_PER_PAGE', 50))
+
+    # ETag / 304 za stranice s bilješkama; salt se mijenja sa svakim deployem
+    # (Render postavlja RENDER_GIT_COMMIT) da se ne poslužuju stari predlošci
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    HTTP_CACHE_SALT = os.environ.get('HTTP_CACHE_SALT', os.environ.get('RENDER_GIT_COMMIT', ''))
+
+    # Kompresija odgovora (gzip; brotli ako je paket 'brotli' instaliran)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))
+
+    # Vendor CSS/JS iz app/static/vendor (`flask assets vendor`) umjesto s CDN-a
+    ASSETS_SERVE_LOCAL = os.environ.get('ASSETS_SERVE_LOCAL', 'False').lower() in ('true', '1', 'yes')
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 86400))
+
+    # Streaming popisa bilješki (stream_template + LazyPage); STREAM_CHUNK_SIZE u
+    # znakovima HTML-a, STREAM_BATCH_SIZE u dokumentima po dohvatu iz baze
+    STREAM_TEMPLATES = os.environ.get('STREAM_TEMPLATES', 'True').lower() in ('true', '1', 'yes')
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 8192))
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 100))
+
+    # Izvoz/uvoz bilješki (NDJSON): serija kursora pri izvozu, bilješki po
+    # insert_many pri uvozu, najviše grešaka u izvještaju, najveća datoteka
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 500))
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', 100))
+    IMPORT_MAX_BYTES = int(os.environ.get('IMPORT_MAX_BYTES', 50 * 1024 * 1024))
+    # renderirati Markdown pri uvozu (sporije) ili kasnije (render-backfill / pri prikazu)
+    IMPORT_RENDER = os.environ.get('IMPORT_RENDER', 'False').lower() in ('true', '1', 'yes')
+
+    # JSON API (/api/v1): zadani i najveći broj bilješki po stranici,
+    # najviše bilješki u jednoj batch operaciji
+    API_PER_PAGE = int(os.environ.get('API_PER_PAGE', 50))
+    API_MAX_PER_PAGE = int(os.environ.get('API_MAX_PER_PAGE', 200))
+    API_BATCH_MAX = int(os.environ.get('API_BATCH_MAX', 100))
+
+    # Povijest izmjena bilješki: svaka N-ta verzija sprema se cijela, ostale
+    # kao komprimirana razlika prema novijoj verziji
+    REVISIONS_SNAPSHOT_INTERVAL = int(os.environ.get('REVISIONS_SNAPSHOT_INTERVAL', 10))
+
+    # Admin statistika: broj korisnika u tablici i broj dana u pregledu po danu
+    STATS_TOP_USERS = int(os.environ.get('STATS_TOP_USERS', 20))
+    STATS_DAYS = int(os.environ.get('STATS_DAYS', 30))
+
+    # Pregled u editoru (POST /notes/preview): odgoda nakon zadnje promjene
+    # teksta i najveći sadržaj koji se renderira
+    PREVIEW_DEBOUNCE_MS = int(os.environ.get('PREVIEW_DEBOUNCE_MS', 400))
+    PREVIEW_MAX_BYTES = int(os.environ.get('PREVIEW_MAX_BYTES', 200 * 1024))
+
+    # Cache renderiranog Markdowna (po workeru)
+    MARKDOWN_CACHE_MAX_ENTRIES = int(os.environ.get('MARKDOWN_CACHE_MAX_ENTRIES', 2048))
+    MARKDOWN_CACHE_MAX_BYTES = int(os.environ.get('MARKDOWN_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # Cache korisnika za user_loader (po workeru); False isključuje cache
+    USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+
+    # Pretraživanje: 'text' (MongoDB text indeks) ili 'terms' (tokeni spremljeni uz
+    # bilješku, za baze bez text indeksa; nakon promjene pokrenuti `flask notes search-reindex`)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'text')
+    SEARCH_RESULTS_PER_PAGE = int(os.environ.get('SEARCH_RESULTS_PER_PAGE', 20))
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 200))
@@ -0,0 +1,55 @@
+import logging
+import os
+
+# Gunicorn postavke iz environmenta: gunicorn -c gunicorn.conf.py run:app
+#
+# Zadano su gthread workeri: dok jedna dretva čeka MongoDB (ili SMTP kad je
+# MAIL_QUEUE_ENABLED=False), ostale dretve istog workera poslužuju druge
+# zahtjeve. Dijeljeno stanje u workeru je thread-safe: jedan MongoClient po
+# procesu (pool od MONGO_MAX_POOL_SIZE veza), mail se šalje iz pozadinskih
+# dretvi reda (app/mailqueue.py), limiter storage i cachevi koriste lockove,
+# a mjerenja po zahtjevu su u thread-local stanju.
+#
+# GUNICORN_WORKER_CLASS=sync vraća stari način rada (jedan zahtjev po procesu).
+# gevent traži paket 'gevent' i nije testiran.
+
+_env = os.environ.get
+
+
+def _flag(name, default):
+    return _env(name, default).lower() in ('true', '1', 'yes')
+
+
+bind = f"0.0.0.0:{_env('PORT', '8000')}"
+worker_class = _env('GUNICORN_WORKER_CLASS', 'gthread')
+# Render free plan: 512 MB i dijeljeni CPU, pa malo procesa s više dretvi
+workers = int(_env('WEB_CONCURRENCY', 2))
+threads = int(_env('GUNICORN_THREADS', 8))
+
+timeout = int(_env('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(_env('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Render proxy drži veze otvorenima; dulje od zadanih 2 s štedi TLS/TCP handshake
+keepalive = int(_env('GUNICORN_KEEPALIVE', 5))
+
+# povremeni restart workera (npr. zbog fragmentacije memorije), s jitterom
+# da se svi ne restartaju istovremeno
+max_requests = int(_env('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(_env('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# bez preloada: MongoClient, mail red i pool za lozinke nastaju u workeru
+preload_app = _flag('GUNICORN_PRELOAD', 'False')
+# heartbeat workera u RAM-u umjesto na disku
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+loglevel = _env('GUNICORN_LOG_LEVEL', 'info')
+accesslog = '-' if _flag('GUNICORN_ACCESS_LOG', 'False') else None
+
+
+def on_starting(server):
+    # svaka dretva može istovremeno držati jednu vezu iz poola
+    pool_size = int(_env('MONGO_MAX_POOL_SIZE', 20))
+    if worker_class == 'gthread' and threads > pool_size:
+        logging.getLogger('gunicorn.error').warning(
+            'GUNICORN_THREADS (%s) je veći od MONGO_MAX_POOL_SIZE (%s); dretve će čekati na vezu.',
+            threads, pool_size
+        )